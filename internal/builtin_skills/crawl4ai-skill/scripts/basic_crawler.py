@@ -1,80 +1,147 @@
 #!/usr/bin/env python3
 """
 Basic Crawl4AI crawler template
-Usage: python basic_crawler.py <url>
+Usage: python basic_crawler.py <url> [--screenshot] [--screenshot-format png|jpeg|webp] [--viewport-only]
+                                     [--wait-images] [--no-cache] [--viewport WxH]
 """
 
+import argparse
 import asyncio
-import sys
-
-# Version check
-MIN_CRAWL4AI_VERSION = "0.7.4"
-try:
-    from crawl4ai.__version__ import __version__
-    from packaging import version
-    if version.parse(__version__) < version.parse(MIN_CRAWL4AI_VERSION):
-        print(f"⚠️  Warning: Crawl4AI {MIN_CRAWL4AI_VERSION}+ recommended (you have {__version__})")
-except ImportError:
-    print(f"ℹ️  Crawl4AI {MIN_CRAWL4AI_VERSION}+ required")
-
-from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig, CacheMode
-
-async def crawl_basic(url: str):
-    """Basic crawling with markdown output"""
-
-    # Configure browser
-    browser_config = BrowserConfig(
-        headless=True,
-        viewport_width=1920,
-        viewport_height=1080
-    )
+import binascii
+import functools
+import inspect
+from io import BytesIO
+from typing import Optional, Tuple
+
+# crawl_utils checks the Crawl4AI version on import
+from crawl_utils import BROWSER_CONFIG, awrite_bytes, awrite_text, get_crawler, run
+from crawl4ai import BrowserConfig, CrawlerRunConfig, CacheMode
+
+# Markdown-only crawls use the shared 1280x800 BROWSER_CONFIG; a screenshot
+# is the only output where the larger viewport is worth the extra render cost
+SCREENSHOT_VIEWPORT = (1920, 1080)
+
+# Viewport captures come back as PNG, but tall pages are stitched into a BMP and
+# failed captures return a JPEG placeholder, so the saved file is re-encoded
+# unless its signature already matches. JPEG/WebP at this quality are several
+# times smaller than PNG for the same page
+SCREENSHOT_FORMATS = ("png", "jpeg", "webp")
+SCREENSHOT_QUALITY = 70
+_IMAGE_SIGNATURES = {"png": b"\x89PNG\r\n\x1a\n", "jpeg": b"\xff\xd8\xff"}
+
+# Viewport-only screenshots need CrawlerRunConfig(force_viewport_screenshot=...), which
+# older Crawl4AI releases lack (their __init__ takes no **kwargs, so passing it raises TypeError)
+HAS_VIEWPORT_SCREENSHOT = "force_viewport_screenshot" in inspect.signature(CrawlerRunConfig).parameters
+
+def encode_screenshot(data: bytes, fmt: str = "png") -> bytes:
+    """Encode screenshot bytes as fmt; data already in fmt is returned unchanged"""
+    signature = _IMAGE_SIGNATURES.get(fmt)
+    if signature and data.startswith(signature):
+        return data
+    from PIL import Image  # installed with Crawl4AI
+    out = BytesIO()
+    Image.open(BytesIO(data)).convert("RGB").save(out, fmt.upper(), quality=SCREENSHOT_QUALITY)
+    return out.getvalue()
+
+@functools.lru_cache(maxsize=None)
+def browser_config_for(viewport: Optional[Tuple[int, int]]) -> BrowserConfig:
+    """BrowserConfig for a viewport, memoized so get_crawler() sees a stable config"""
+    if viewport is None:
+        return BROWSER_CONFIG
+    width, height = viewport
+    return BROWSER_CONFIG.clone(viewport_width=width, viewport_height=height)
+
+def parse_viewport(value: str) -> Tuple[int, int]:
+    """Parse a WIDTHxHEIGHT string such as 1920x1080"""
+    try:
+        width, height = value.lower().split("x")
+        return int(width), int(height)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got {value!r}")
+
+async def crawl_basic(url: str, screenshot: bool = False, wait_images: bool = False, no_cache: bool = False,
+                      viewport: Optional[Tuple[int, int]] = None, screenshot_format: str = "png",
+                      viewport_only: bool = False):
+    """
+    Basic crawling with markdown output
+    Screenshots and waiting for images are opt-in: both are wasted work when only markdown is needed
+    Pages are served from Crawl4AI's cache on repeat runs unless no_cache is set
+    viewport defaults to the shared config, or SCREENSHOT_VIEWPORT when a screenshot is requested
+    screenshot_format picks the saved image format (see SCREENSHOT_FORMATS)
+    viewport_only captures just the visible viewport in one shot, skipping the scroll-and-stitch
+    pass Crawl4AI uses for full-page screenshots of long pages
+    """
+    if viewport is None and screenshot:
+        viewport = SCREENSHOT_VIEWPORT
+    if screenshot and viewport_only and not HAS_VIEWPORT_SCREENSHOT:
+        print("⚠️  This Crawl4AI version cannot limit screenshots to the viewport; taking a full-page screenshot")
+        viewport_only = False
 
     # Configure crawler
     crawler_config = CrawlerRunConfig(
-        cache_mode=CacheMode.BYPASS,
+        cache_mode=CacheMode.BYPASS if no_cache else CacheMode.ENABLED,
         remove_overlay_elements=True,
-        wait_for_images=True,
-        screenshot=True
+        wait_for_images=wait_images,
+        screenshot=screenshot,
+        # Only passed when requested and supported (see HAS_VIEWPORT_SCREENSHOT)
+        **({"force_viewport_screenshot": True} if screenshot and viewport_only else {})
+    )
+
+    crawler = await get_crawler(browser_config_for(viewport))
+    result = await crawler.arun(
+        url=url,
+        config=crawler_config
     )
 
-    async with AsyncWebCrawler(config=browser_config) as crawler:
-        result = await crawler.arun(
-            url=url,
-            config=crawler_config
-        )
-
-        if result.success:
-            print(f"✅ Crawled: {result.url}")
-            print(f"   Title: {result.metadata.get('title', 'N/A')}")
-            print(f"   Links found: {len(result.links.get('internal', []))} internal, {len(result.links.get('external', []))} external")
-            print(f"   Media found: {len(result.media.get('images', []))} images, {len(result.media.get('videos', []))} videos")
-            print(f"   Content length: {len(result.markdown)} chars")
-
-            # Save markdown
-            with open("output.md", "w") as f:
-                f.write(result.markdown)
-            print("📄 Saved to output.md")
-
-            # Save screenshot if available
-            if result.screenshot:
-                # Check if screenshot is base64 string or bytes
-                if isinstance(result.screenshot, str):
-                    import base64
-                    screenshot_data = base64.b64decode(result.screenshot)
-                else:
-                    screenshot_data = result.screenshot
-                with open("screenshot.png", "wb") as f:
-                    f.write(screenshot_data)
-                print("📸 Saved screenshot.png")
-        else:
-            print(f"❌ Failed: {result.error_message}")
-
-        return result
+    if result.success:
+        print(f"✅ Crawled: {result.url}")
+        print(f"   Title: {result.metadata.get('title', 'N/A')}")
+        links = result.links or {}
+        media = result.media or {}
+        # Read the markdown once: it may be built on attribute access
+        md = result.markdown or ""
+        md_len = len(md)
+        print(f"   Links found: {len(links.get('internal', ()))} internal, {len(links.get('external', ()))} external")
+        print(f"   Media found: {len(media.get('images', ()))} images, {len(media.get('videos', ()))} videos")
+        print(f"   Content length: {md_len} chars")
+
+        # Save markdown
+        await awrite_text("output.md", md)
+        print("📄 Saved to output.md")
+
+        # Save screenshot if requested
+        if screenshot and result.screenshot:
+            # Screenshot may be a base64 string or raw bytes
+            data = result.screenshot
+            if isinstance(data, str):
+                # a2b_base64 reads the ASCII str in place; base64.b64decode would
+                # first copy it into a bytes object
+                data = binascii.a2b_base64(data)
+            data = await asyncio.to_thread(encode_screenshot, data, screenshot_format)
+            screenshot_path = f"screenshot.{screenshot_format}"
+            await awrite_bytes(screenshot_path, data)
+            print(f"📸 Saved {screenshot_path}")
+    else:
+        print(f"❌ Failed: {result.error_message}")
+
+    return result
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python basic_crawler.py <url>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Crawl a URL and save its markdown to output.md")
+    parser.add_argument("url", help="URL to crawl")
+    parser.add_argument("--screenshot", action="store_true", help="Also save a full-page screenshot.png")
+    parser.add_argument("--screenshot-format", choices=SCREENSHOT_FORMATS, default="png",
+                        help=f"Screenshot image format; jpeg/webp are saved at quality {SCREENSHOT_QUALITY} "
+                             "and are much smaller (default: png)")
+    parser.add_argument("--viewport-only", action="store_true",
+                        help="Screenshot only the visible viewport instead of the full page (much faster on long pages; "
+                             "falls back to a full-page screenshot on Crawl4AI releases without this option)")
+    parser.add_argument("--wait-images", action="store_true", help="Wait for all images to load before extracting")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass Crawl4AI's cache and always re-fetch the page")
+    parser.add_argument("--viewport", type=parse_viewport, metavar="WxH",
+                        help="Browser viewport (default: 1280x800, or 1920x1080 with --screenshot)")
+    args = parser.parse_args()
 
-    url = sys.argv[1]
-    asyncio.run(crawl_basic(url))
+    run(crawl_basic(args.url, screenshot=args.screenshot, wait_images=args.wait_images, no_cache=args.no_cache,
+                    viewport=args.viewport, screenshot_format=args.screenshot_format,
+                    viewport_only=args.viewport_only))
@@ -1,139 +1,168 @@
 #!/usr/bin/env python3
 """
 Crawl4AI batch/multi-URL crawler with concurrent processing
-Usage: python batch_crawler.py urls.txt [--max-concurrent 5]
+Usage: python batch_crawler.py urls.txt [--max-concurrent N] [--extract [schema.json]] (see --help)
 """
 
-import asyncio
+import argparse
 import sys
-import json
+import itertools
+import re
 from pathlib import Path
-from typing import List, Dict, Any
-
-# Version check
-MIN_CRAWL4AI_VERSION = "0.7.4"
-try:
-    from crawl4ai.__version__ import __version__
-    from packaging import version
-    if version.parse(__version__) < version.parse(MIN_CRAWL4AI_VERSION):
-        print(f"⚠️  Warning: Crawl4AI {MIN_CRAWL4AI_VERSION}+ recommended (you have {__version__})")
-except ImportError:
-    print(f"ℹ️  Crawl4AI {MIN_CRAWL4AI_VERSION}+ required")
-
-from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig, CacheMode
-
-async def crawl_batch(urls: List[str], max_concurrent: int = 5):
+from urllib.parse import urlsplit
+from typing import Iterable, Optional
+
+# crawl_utils checks the Crawl4AI version on import
+from crawl_utils import (
+    BROWSER_CONFIG, adump_json, arun_many_dispatcher, awrite_text, chunks, crawl_many,
+    default_concurrency, get_crawler, json_dumps, json_loads, load_urls, run
+)
+from crawl4ai import CrawlerRunConfig, CacheMode
+from crawl4ai.extraction_strategy import JsonCssExtractionStrategy
+
+# Runs of characters not allowed in markdown filenames
+_SAFE_RE = re.compile(r"[^A-Za-z0-9_-]+")
+
+# Attempts per URL in extraction mode (exponential backoff between them)
+EXTRACT_ATTEMPTS = 3
+
+# Default extraction schema for general content
+_DEFAULT_BATCH_SCHEMA = {
+    "name": "content",
+    "selector": "body",
+    "fields": [
+        {"name": "headings", "selector": "h1, h2, h3", "type": "text", "all": True},
+        {"name": "paragraphs", "selector": "p", "type": "text", "all": True},
+        {"name": "links", "selector": "a[href]", "type": "attribute", "attribute": "href", "all": True}
+    ]
+}
+
+def _numbered(urls: Iterable[str], index: dict) -> Iterable[str]:
+    """Yield urls unchanged, recording each URL's input position in index"""
+    for position, url in enumerate(urls):
+        index[url] = position
+        yield url
+
+async def _arun_many_chunked(crawler, urls: Iterable[str], config: CrawlerRunConfig, max_concurrent: int):
+    """arun_many over CHUNK_SIZE slices of urls, streaming each slice's results"""
+    for chunk in chunks(urls):
+        async for result in await crawler.arun_many(urls=chunk, config=config,
+                                                    dispatcher=arun_many_dispatcher(max_concurrent)):
+            yield result
+
+async def crawl_batch(urls: Iterable[str], max_concurrent: Optional[int] = None, use_arun_many: bool = False,
+                      pretty: bool = False, no_cache: bool = False):
     """
     Crawl multiple URLs efficiently with concurrent processing
+    max_concurrent defaults to a workload-sized limit (see crawl_utils.default_concurrency)
+    pretty indents batch_results.json for humans; machine output stays compact by default
+    no_cache bypasses Crawl4AI's page cache, which is otherwise reused on repeat runs
     """
-    print(f"🚀 Starting batch crawl of {len(urls)} URLs (max {max_concurrent} concurrent)")
-
-    # Configure browser for efficiency
-    browser_config = BrowserConfig(
-        headless=True,
-        viewport_width=1280,
-        viewport_height=800,
-        verbose=False
-    )
+    max_concurrent = max_concurrent or default_concurrency(urls)
+    print(f"🚀 Starting batch crawl (max {max_concurrent} concurrent)")
 
     # Configure crawler
     crawler_config = CrawlerRunConfig(
-        cache_mode=CacheMode.BYPASS,
+        cache_mode=CacheMode.BYPASS if no_cache else CacheMode.ENABLED,
         remove_overlay_elements=True,
         wait_for="css:body",
         page_timeout=30000,  # 30 seconds timeout per page
-        screenshot=False  # Disable screenshots for batch processing
+        screenshot=False,  # Disable screenshots for batch processing
+        stream=True  # arun_many yields results as they finish instead of buffering the batch
     )
 
-    results = []
-    failed = []
+    markdown_dir = Path("batch_markdown")
+    markdown_dir.mkdir(exist_ok=True)
+    results_path = "batch_results.jsonl"
 
-    async with AsyncWebCrawler(config=browser_config) as crawler:
-        # Use arun_many for efficient batch processing
-        batch_results = await crawler.arun_many(
-            urls=urls,
-            config=crawler_config,
-            max_concurrent=max_concurrent
-        )
+    # Results arrive in completion order; markdown files are numbered by input
+    # position instead so a URL keeps the same file name from run to run
+    input_index = {}
+    urls = _numbered(urls, input_index)
 
-        for result in batch_results:
+    crawler = await get_crawler(BROWSER_CONFIG)
+    if use_arun_many:
+        batch_results = _arun_many_chunked(crawler, urls, crawler_config, max_concurrent)
+    else:
+        batch_results = crawl_many(crawler, urls, crawler_config, max_concurrent)
+
+    # Flush each result to disk as it arrives; only counters stay in memory
+    success_count = 0
+    failed_count = 0
+    with open(results_path, "wb", buffering=1 << 20) as results_file:
+        async for result in batch_results:
+            position = input_index.pop(result.url, None)
             if result.success:
-                results.append({
+                links = result.links or {}
+                # Read the markdown once: it may be built on attribute access
+                md = result.markdown or ""
+                record = {
                     "url": result.url,
+                    "success": True,
                     "title": result.metadata.get("title", ""),
                     "description": result.metadata.get("description", ""),
-                    "content_length": len(result.markdown),
-                    "links_count": len(result.links.get("internal", [])) + len(result.links.get("external", [])),
-                    "images_count": len(result.media.get("images", [])),
-                })
+                    "content_length": len(md),
+                    "links_count": len(links.get("internal", ())) + len(links.get("external", ())),
+                    "images_count": len((result.media or {}).get("images", ())),
+                }
+
+                # Create safe filename from URL
+                parts = urlsplit(result.url)
+                safe_name = _SAFE_RE.sub("_", parts.netloc + parts.path)[:100]
+
+                prefix = f"{position:03d}_" if position is not None else ""
+                file_path = markdown_dir / f"{prefix}{safe_name}.md"
+                await awrite_text(file_path, f"# {result.metadata.get('title', result.url)}\n\nURL: {result.url}\n\n{md}")
+
+                success_count += 1
                 print(f"✅ {result.url}")
             else:
-                failed.append({
+                record = {
                     "url": result.url,
+                    "success": False,
                     "error": result.error_message
-                })
+                }
+                failed_count += 1
                 print(f"❌ {result.url}: {result.error_message}")
 
-    # Save results
+            # A short line into a 1 MiB buffer: cheaper inline than a thread hop
+            results_file.write(json_dumps(record) + b"\n")
+
+    # Save summary
     output = {
-        "success_count": len(results),
-        "failed_count": len(failed),
-        "results": results,
-        "failed": failed
+        "success_count": success_count,
+        "failed_count": failed_count,
+        "results_file": results_path,
+        "markdown_dir": str(markdown_dir)
     }
 
-    with open("batch_results.json", "w") as f:
-        json.dump(output, f, indent=2)
+    await adump_json(output, "batch_results.json", pretty=pretty)
 
-    # Save individual markdown files
-    markdown_dir = Path("batch_markdown")
-    markdown_dir.mkdir(exist_ok=True)
-
-    for i, result in enumerate(batch_results):
-        if result.success:
-            # Create safe filename from URL
-            safe_name = result.url.replace("https://", "").replace("http://", "")
-            safe_name = "".join(c if c.isalnum() or c in "-_" else "_" for c in safe_name)[:100]
-
-            file_path = markdown_dir / f"{i:03d}_{safe_name}.md"
-            with open(file_path, "w") as f:
-                f.write(f"# {result.metadata.get('title', result.url)}\n\n")
-                f.write(f"URL: {result.url}\n\n")
-                f.write(result.markdown)
-
-    print(f"\n📊 Batch Crawl Complete:")
-    print(f"   ✅ Success: {len(results)}")
-    print(f"   ❌ Failed: {len(failed)}")
-    print(f"   💾 Results saved to: batch_results.json")
+    print("\n📊 Batch Crawl Complete:")
+    print(f"   ✅ Success: {success_count}")
+    print(f"   ❌ Failed: {failed_count}")
+    print(f"   💾 Per-URL results saved to: {results_path}")
+    print("   💾 Summary saved to: batch_results.json")
     print(f"   📁 Markdown files saved to: {markdown_dir}/")
 
     return output
 
-async def crawl_with_extraction(urls: List[str], schema_file: str = None):
+async def crawl_with_extraction(urls: Iterable[str], schema_file: str = None, max_concurrent: Optional[int] = None,
+                                pretty: bool = False):
     """
     Batch crawl with structured data extraction
     """
-    from crawl4ai.extraction_strategy import JsonCssExtractionStrategy
+    max_concurrent = max_concurrent or default_concurrency(urls)
 
-    schema = None
+    schema = _DEFAULT_BATCH_SCHEMA
     if schema_file and Path(schema_file).exists():
-        with open(schema_file) as f:
-            schema = json.load(f)
+        schema = json_loads(Path(schema_file).read_bytes())
         print(f"📋 Using extraction schema from: {schema_file}")
-    else:
-        # Default schema for general content
-        schema = {
-            "name": "content",
-            "selector": "body",
-            "fields": [
-                {"name": "headings", "selector": "h1, h2, h3", "type": "text", "all": True},
-                {"name": "paragraphs", "selector": "p", "type": "text", "all": True},
-                {"name": "links", "selector": "a[href]", "type": "attribute", "attribute": "href", "all": True}
-            ]
-        }
 
     extraction_strategy = JsonCssExtractionStrategy(schema=schema)
 
+    # Always bypass: a cache hit replays the extracted_content stored for the URL,
+    # whatever schema produced it
     crawler_config = CrawlerRunConfig(
         extraction_strategy=extraction_strategy,
         cache_mode=CacheMode.BYPASS
@@ -141,96 +170,76 @@ async def crawl_with_extraction(urls: List[str], schema_file: str = None):
 
     extracted_data = []
 
-    async with AsyncWebCrawler() as crawler:
-        results = await crawler.arun_many(
-            urls=urls,
-            config=crawler_config,
-            max_concurrent=5
-        )
-
-        for result in results:
-            if result.success and result.extracted_content:
-                try:
-                    data = json.loads(result.extracted_content)
-                    extracted_data.append({
-                        "url": result.url,
-                        "data": data
-                    })
-                    print(f"✅ Extracted from: {result.url}")
-                except json.JSONDecodeError:
-                    print(f"⚠️ Failed to parse JSON from: {result.url}")
+    crawler = await get_crawler(BROWSER_CONFIG)
+    # Timeouts and unparsable output are retried with backoff before a URL is given up on
+    async for result, data in crawl_many(crawler, urls, crawler_config, max_concurrent,
+                                         attempts=EXTRACT_ATTEMPTS, parse=json_loads):
+        if result.success and data is not None:
+            extracted_data.append({
+                "url": result.url,
+                "data": data
+            })
+            print(f"✅ Extracted from: {result.url}")
+        else:
+            print(f"❌ Extraction failed for {result.url}: {result.error_message}")
 
     # Save extracted data
-    with open("batch_extracted.json", "w") as f:
-        json.dump(extracted_data, f, indent=2)
+    await adump_json(extracted_data, "batch_extracted.json", pretty=pretty)
 
-    print(f"\n💾 Extracted data saved to: batch_extracted.json")
+    print("\n💾 Extracted data saved to: batch_extracted.json")
     return extracted_data
 
-def load_urls(source: str) -> List[str]:
-    """Load URLs from file or string"""
-    if Path(source).exists():
-        with open(source) as f:
-            urls = [line.strip() for line in f if line.strip() and not line.startswith("#")]
-    else:
-        # Treat as comma-separated URLs
-        urls = [url.strip() for url in source.split(",") if url.strip()]
-
-    return urls
-
-async def main():
-    if len(sys.argv) < 2:
-        print("""
-Crawl4AI Batch Crawler
-
-Usage:
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Crawl4AI Batch Crawler",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
     # Crawl URLs from file
-    python batch_crawler.py urls.txt [--max-concurrent 5]
+    python batch_crawler.py urls.txt --max-concurrent 8
 
     # Crawl with extraction
-    python batch_crawler.py urls.txt --extract [schema.json]
+    python batch_crawler.py urls.txt --extract
+    python batch_crawler.py urls.txt --schema schema.json
 
     # Crawl comma-separated URLs
     python batch_crawler.py "https://example.com,https://example.org"
 
-Options:
-    --max-concurrent N    Max concurrent crawls (default: 5)
-    --extract [schema]    Extract structured data using schema
-
 Example urls.txt:
     https://example.com
     https://example.org
     # Comments are ignored
     https://another-site.com
 """)
-        sys.exit(1)
-
-    source = sys.argv[1]
-    urls = load_urls(source)
-
-    if not urls:
+    parser.add_argument("urls", help="File with one URL per line, or comma-separated URLs")
+    parser.add_argument("--max-concurrent", type=int, metavar="N",
+                        help="Max concurrent crawls "
+                             "(default: $CRAWL4AI_MAX_CONCURRENT or 4x CPU count up to 32, capped by URL count)")
+    parser.add_argument("--use-arun-many", action="store_true",
+                        help="Dispatch through crawler.arun_many instead of per-URL tasks")
+    parser.add_argument("--extract", nargs="?", const="", metavar="SCHEMA",
+                        help="Extract structured data, optionally using a schema file")
+    parser.add_argument("--schema", metavar="FILE", help="Schema file for extraction (implies --extract)")
+    parser.add_argument("--pretty", action="store_true", help="Indent the JSON output files (compact by default)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Re-fetch every page instead of reusing Crawl4AI's cache")
+    return parser.parse_args(argv)
+
+async def main(args: argparse.Namespace):
+    urls = load_urls(args.urls)
+
+    first_url = next(urls, None)
+    if first_url is None:
         print("❌ No URLs found")
         sys.exit(1)
+    urls = itertools.chain([first_url], urls)
 
-    print(f"📋 Loaded {len(urls)} URLs")
-
-    # Parse options
-    max_concurrent = 5
-    extract_mode = False
-    schema_file = None
-
-    for i, arg in enumerate(sys.argv[2:], 2):
-        if arg == "--max-concurrent" and i + 1 < len(sys.argv):
-            max_concurrent = int(sys.argv[i + 1])
-        elif arg == "--extract":
-            extract_mode = True
-            if i + 1 < len(sys.argv) and not sys.argv[i + 1].startswith("--"):
-                schema_file = sys.argv[i + 1]
+    print(f"📋 Loading URLs from: {args.urls}")
 
-    if extract_mode:
-        await crawl_with_extraction(urls, schema_file)
+    if args.extract is not None or args.schema:
+        await crawl_with_extraction(urls, args.schema or args.extract or None, args.max_concurrent, args.pretty)
     else:
-        await crawl_batch(urls, max_concurrent)
+        await crawl_batch(urls, args.max_concurrent, args.use_arun_many, args.pretty, args.no_cache)
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run(main(parse_args()))
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for the Crawl4AI skill scripts
+Keeps one started AsyncWebCrawler per BrowserConfig so a process running
+several crawl/extraction modes only pays the browser launch once.
+
+Usage (from another script in this directory):
+    from crawl_utils import BROWSER_CONFIG, get_crawler, run
+
+    crawler = await get_crawler(BROWSER_CONFIG)
+    result = await crawler.arun(url, config=crawler_config)
+
+    run(main())  # like asyncio.run(), but closes shared crawlers on exit or SIGTERM
+
+Importing this module checks the installed Crawl4AI version once; the result
+is remembered in CRAWL4AI_VERSION_OK so child processes skip the check.
+
+Environment:
+    CRAWL4AI_MAX_CONCURRENT   Concurrency limit used when none is passed explicitly
+"""
+
+import asyncio
+import functools
+import itertools
+import json
+import os
+import re
+import signal
+from pathlib import Path
+from urllib.parse import urlsplit, urlunsplit
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Sized, Tuple
+
+MIN_CRAWL4AI_VERSION = (0, 7, 4)
+
+
+def check_version():
+    """Warn if Crawl4AI is older than MIN_CRAWL4AI_VERSION; memoized via CRAWL4AI_VERSION_OK"""
+    if os.environ.get("CRAWL4AI_VERSION_OK") == "1":
+        return
+
+    min_version = ".".join(map(str, MIN_CRAWL4AI_VERSION))
+    try:
+        from crawl4ai.__version__ import __version__
+    except ImportError:
+        print(f"ℹ️  Crawl4AI {min_version}+ required")
+        return
+
+    # Plain tuple compare; avoids importing packaging.version for one check
+    installed = tuple(int(part) for part in re.findall(r"\d+", __version__)[:3])
+    if installed < MIN_CRAWL4AI_VERSION:
+        print(f"⚠️  Warning: Crawl4AI {min_version}+ recommended (you have {__version__})")
+    else:
+        os.environ["CRAWL4AI_VERSION_OK"] = "1"
+
+
+# Runs before crawl4ai is imported so a missing install still gets the hint
+check_version()
+
+from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig, MemoryAdaptiveDispatcher, RateLimiter
+
+try:
+    import orjson
+except ImportError:  # optional speedup, stdlib json is the fallback
+    orjson = None
+
+# Shared by basic/batch/extraction scripts; get_crawler() keeps one browser per config.
+# Not a persistent context: Crawl4AI launches those as a managed Chrome on the fixed
+# debugging port 9222, killing whatever already listens there, and (0.7.x) hands every
+# concurrent arun() the same tab.
+BROWSER_CONFIG = BrowserConfig(
+    headless=True,
+    viewport_width=1280,
+    viewport_height=800,
+    verbose=False
+)
+
+# arun_many() builds a task per URL up front, so callers hand it URLs this many
+# at a time; huge URL lists never become one task (or one list) per URL at once
+CHUNK_SIZE = 200
+
+# id(BrowserConfig) -> (config, started crawler). The config is kept referenced
+# so its id stays unique for the lifetime of the cache.
+_crawlers: Dict[int, Tuple[Optional[BrowserConfig], AsyncWebCrawler]] = {}
+_crawlers_lock: Optional[asyncio.Lock] = None
+
+
+async def get_crawler(config: Optional[BrowserConfig] = None) -> AsyncWebCrawler:
+    """
+    Return a started crawler for the given BrowserConfig, launching it on first use.
+    Pass module-level config constants so repeated calls share one browser.
+    """
+    global _crawlers_lock
+    if _crawlers_lock is None:
+        _crawlers_lock = asyncio.Lock()
+
+    key = id(config)
+    async with _crawlers_lock:
+        entry = _crawlers.get(key)
+        if entry is None:
+            crawler = AsyncWebCrawler(config=config)
+            await crawler.start()
+            entry = _crawlers[key] = (config, crawler)
+        return entry[1]
+
+
+# Upper bound for the CPU-derived default: past a few dozen pages in flight,
+# timeouts and rate limiting cost more throughput than the extra concurrency buys
+MAX_DEFAULT_CONCURRENCY = 32
+
+
+@functools.lru_cache(maxsize=None)
+def _env_concurrency(value: str) -> Optional[int]:
+    """Parse a CRAWL4AI_MAX_CONCURRENT value; warns (once per value) and returns None if invalid"""
+    try:
+        limit = int(value)
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        print(f"⚠️ Ignoring CRAWL4AI_MAX_CONCURRENT={value!r}: expected a positive integer")
+        return None
+    return limit
+
+
+def default_concurrency(urls: Optional[Iterable[str]] = None) -> int:
+    """
+    Concurrency sized from the workload instead of a fixed constant:
+    CRAWL4AI_MAX_CONCURRENT if set to a positive integer, otherwise 4x CPU count up to
+    MAX_DEFAULT_CONCURRENCY, capped by the URL count when known
+    """
+    env_value = os.environ.get("CRAWL4AI_MAX_CONCURRENT")
+    limit = _env_concurrency(env_value) if env_value else None
+    if limit is None:
+        limit = min(MAX_DEFAULT_CONCURRENCY, (os.cpu_count() or 1) * 4)
+    if isinstance(urls, Sized) and len(urls):
+        limit = min(limit, len(urls))
+    return limit
+
+
+# Per-domain pacing for arun_many_dispatcher(), spelled out with RateLimiter()'s own
+# defaults: a random 1-3s between requests to one domain, backing off up to 60s on 429/503
+RATE_LIMIT_BASE_DELAY = (1.0, 3.0)
+RATE_LIMIT_MAX_DELAY = 60.0
+
+
+def arun_many_dispatcher(max_concurrent: int) -> MemoryAdaptiveDispatcher:
+    """
+    Dispatcher for crawler.arun_many(dispatcher=...) that caps concurrency at max_concurrent.
+    arun_many() silently swallows a max_concurrent keyword; this dispatcher honours it and
+    rate-limits each domain (see RATE_LIMIT_BASE_DELAY), so batched Google searches are
+    paced the same as any other crawl.
+    Supports stream=True configs; create one per arun_many() call.
+    """
+    return MemoryAdaptiveDispatcher(
+        max_session_permit=max_concurrent,
+        rate_limiter=RateLimiter(base_delay=RATE_LIMIT_BASE_DELAY, max_delay=RATE_LIMIT_MAX_DELAY, max_retries=3)
+    )
+
+
+def _canon(url: str) -> str:
+    """Canonical form used for dedup: lowercase scheme/host, no trailing slash, no fragment"""
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/") or "/", parts.query, ""))
+
+
+# Start of an absolute URL; a comma-separated list only counts as one when every
+# piece starts like this, so https://x.com/?ids=1,2 stays a single URL
+_URL_START = re.compile(r"^[A-Za-z][A-Za-z0-9+.-]*://")
+
+
+def _read_urls(source: str) -> Iterator[str]:
+    try:
+        f = open(source)
+    except OSError:
+        # Not a readable file: one URL, or comma-separated URLs
+        parts = [url.strip() for url in source.split(",") if url.strip()]
+        if all(_URL_START.match(part) for part in parts):
+            yield from parts
+        else:
+            yield source.strip()
+        return
+
+    with f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line
+
+
+def load_urls(source: str) -> Iterator[str]:
+    """
+    Yield deduplicated URLs from a file (one per line, # comments ignored),
+    comma-separated URLs, or a single URL
+    Duplicates are detected on the _canon() form, but URLs are yielded as given
+    The file is read lazily; only the set of seen URLs is kept in memory
+    """
+    seen = set()
+    total = 0
+    for url in _read_urls(source):
+        total += 1
+        key = _canon(url)
+        if key not in seen:
+            seen.add(key)
+            yield url
+
+    if total != len(seen):
+        print(f"🔁 Deduped {total}→{len(seen)} URLs")
+
+
+def chunks(iterable: Iterable, size: int = CHUNK_SIZE) -> Iterator[List]:
+    """Split an iterable into lists of at most size items, reading it lazily"""
+    it = iter(iterable)
+    while chunk := list(itertools.islice(it, size)):
+        yield chunk
+
+
+# Errors worth another attempt: timeouts and unparsable extraction output
+# (json.JSONDecodeError is a ValueError)
+RETRY_EXCEPTIONS = (asyncio.TimeoutError, TimeoutError, ValueError)
+
+# Crawl4AI reports most failures as an unsuccessful result rather than raising;
+# those are only retried when the error is a timeout (a 404 or DNS failure won't
+# change on the next attempt)
+_TRANSIENT_ERROR = re.compile(r"timeout|timed out", re.IGNORECASE)
+
+
+async def arun_with_retry(crawler: AsyncWebCrawler, url: str, config: CrawlerRunConfig,
+                          attempts: int = 3, min_delay: float = 1.0, max_delay: float = 30.0,
+                          parse: Optional[Callable] = None):
+    """
+    crawler.arun() retried with exponential backoff (min_delay, 2x, ... capped at max_delay)
+    while it times out or parse(extracted_content) raises a ValueError. Other failures are
+    returned straight away.
+    When every attempt fails, the last result is returned marked failed with the last error in
+    result.error_message; the last exception is re-raised if no attempt returned a result.
+    With parse, returns (result, parsed) so callers don't decode the output a second time;
+    parsed is None unless the result succeeded with extracted content.
+    """
+    result = None
+    parsed = None
+    last_exc = None
+    for attempt in range(1, attempts + 1):
+        try:
+            result = await crawler.arun(url=url, config=config)
+            if result.success:
+                if parse is not None and result.extracted_content:
+                    parsed = parse(result.extracted_content)
+                break
+            if not _TRANSIENT_ERROR.search(result.error_message or ""):
+                break
+            last_error = result.error_message
+        except RETRY_EXCEPTIONS as e:
+            last_exc = e
+            last_error = f"{type(e).__name__}: {e}"
+
+        if attempt < attempts:
+            delay = min(max_delay, min_delay * 2 ** (attempt - 1))
+            print(f"🔁 Attempt {attempt}/{attempts} failed for {url} ({last_error}), retrying in {delay:.0f}s")
+            await asyncio.sleep(delay)
+    else:
+        if result is None:
+            raise last_exc
+        # Also covers output that never parsed: callers check success, not error_message
+        result.success = False
+        result.error_message = last_error
+
+    return result if parse is None else (result, parsed)
+
+
+async def crawl_many(crawler: AsyncWebCrawler, urls: Iterable[str],
+                     config: CrawlerRunConfig, max_concurrent: int,
+                     attempts: int = 1, parse: Optional[Callable] = None) -> AsyncIterator:
+    """
+    Crawl URLs with one arun() task each, at most max_concurrent in flight.
+    Yields results in completion order so callers can flush them as they arrive.
+    URLs are read lazily as a sliding window: each finished task is replaced by the
+    next URL straight away, so one slow URL never holds the other slots idle and
+    memory stays flat for any input size.
+    With attempts > 1 or parse, each URL goes through arun_with_retry(); with parse the
+    yielded items are its (result, parsed) pairs.
+    """
+    async def _crawl_one(url: str):
+        if attempts > 1 or parse is not None:
+            return await arun_with_retry(crawler, url, config, attempts=attempts, parse=parse)
+        return await crawler.arun(url=url, config=config)
+
+    url_iter = iter(urls)
+    pending = {asyncio.ensure_future(_crawl_one(url)) for url in itertools.islice(url_iter, max_concurrent)}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # Refill the freed slots before handing results back, so crawls keep
+            # running while the caller writes them out
+            for url in itertools.islice(url_iter, len(done)):
+                pending.add(asyncio.ensure_future(_crawl_one(url)))
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def json_dumps(obj, pretty: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes, using orjson when it is installed"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    if pretty:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def json_loads(data):
+    """Parse JSON from str or bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dump_json(obj, path, pretty: bool = True):
+    """Write obj as JSON to path in a single bytes write"""
+    Path(path).write_bytes(json_dumps(obj, pretty=pretty))
+
+
+# Disk writes run in a worker thread so they overlap with in-flight crawls
+# instead of blocking the event loop.
+
+async def awrite_bytes(path, data: bytes):
+    await asyncio.to_thread(Path(path).write_bytes, data)
+
+
+async def awrite_text(path, text: str):
+    await asyncio.to_thread(Path(path).write_text, text, encoding="utf-8")
+
+
+async def adump_json(obj, path, pretty: bool = True):
+    await asyncio.to_thread(dump_json, obj, path, pretty)
+
+
+async def close_crawlers():
+    """Close every crawler opened through get_crawler()"""
+    while _crawlers:
+        _, (_, crawler) = _crawlers.popitem()
+        try:
+            await crawler.close()
+        except Exception as e:
+            print(f"⚠️ Failed to close crawler: {e}")
+
+
+async def _run_and_close(coro):
+    task = asyncio.ensure_future(coro)
+    loop = asyncio.get_running_loop()
+    try:
+        # SIGTERM cancels the work so the finally block still closes the browser
+        loop.add_signal_handler(signal.SIGTERM, task.cancel)
+    except (NotImplementedError, AttributeError):  # Windows
+        pass
+
+    try:
+        return await task
+    finally:
+        await asyncio.shield(close_crawlers())
+
+
+def run(coro):
+    """asyncio.run() that shuts down shared crawlers before the loop closes"""
+    return asyncio.run(_run_and_close(coro))
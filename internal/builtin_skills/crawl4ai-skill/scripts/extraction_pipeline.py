@@ -7,33 +7,87 @@ Crawl4AI extraction pipeline - Three approaches:
 
 Usage examples:
   Generate schema: python extraction_pipeline.py --generate-schema <url> "<instruction>"
-  Use generated schema: python extraction_pipeline.py --use-schema <url> schema.json
-  Manual CSS: python extraction_pipeline.py --css <url> "<css_selector>"
-  Direct LLM: python extraction_pipeline.py --llm <url> "<instruction>"
+  Use generated schema: python extraction_pipeline.py --use-schema <urls_or_file> schema.json
+  Manual schema: python extraction_pipeline.py --manual <urls_or_file>
+  Direct LLM: python extraction_pipeline.py --llm <urls_or_file> "<instruction>"
+  Add --pretty to indent the multi-URL output files.
+
+<urls_or_file> is a URL, comma-separated URLs, or a file with one URL per line.
 """
 
-import asyncio
-import sys
+import argparse
 import json
 from pathlib import Path
+from typing import AsyncIterator, List, Tuple, Union
 
-# Version check
-MIN_CRAWL4AI_VERSION = "0.7.4"
-try:
-    from crawl4ai.__version__ import __version__
-    from packaging import version
-    if version.parse(__version__) < version.parse(MIN_CRAWL4AI_VERSION):
-        print(f"⚠️  Warning: Crawl4AI {MIN_CRAWL4AI_VERSION}+ recommended (you have {__version__})")
-except ImportError:
-    print(f"ℹ️  Crawl4AI {MIN_CRAWL4AI_VERSION}+ required")
-
-from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig
+# crawl_utils checks the Crawl4AI version on import
+from crawl_utils import (
+    BROWSER_CONFIG, adump_json, arun_with_retry, awrite_text, crawl_many,
+    default_concurrency, get_crawler, json_loads, load_urls, run
+)
+from crawl4ai import CrawlerRunConfig
 from crawl4ai.extraction_strategy import (
-    LLMExtractionStrategy,
     JsonCssExtractionStrategy,
+    LLMExtractionStrategy,
     CosineStrategy
 )
 
+# LLM calls are retried with backoff (1s, 2s, ... up to 30s) on timeouts and unparsable output
+LLM_ATTEMPTS = 3
+
+# Used when an LLM-generated schema comes back without fields
+_FALLBACK_SCHEMA = {
+    "name": "items",
+    "baseSelector": "div.item, article, .product",
+    "fields": [
+        {"name": "title", "selector": "h1, h2, h3", "type": "text"},
+        {"name": "description", "selector": "p", "type": "text"},
+        {"name": "link", "selector": "a", "type": "attribute", "attribute": "href"}
+    ]
+}
+
+# Example schema for general content extraction
+_DEFAULT_MANUAL_SCHEMA = {
+    "name": "content",
+    "baseSelector": "body",  # Changed from 'selector' to 'baseSelector'
+    "fields": [
+        {"name": "title", "selector": "h1", "type": "text"},
+        {"name": "paragraphs", "selector": "p", "type": "text", "all": True},
+        {"name": "links", "selector": "a", "type": "attribute", "attribute": "href", "all": True}
+    ]
+}
+
+async def _extract(urls: List[str], crawler_config: CrawlerRunConfig, attempts: int = 1) -> AsyncIterator[Tuple]:
+    """
+    Run crawler_config (and its extraction strategy) over urls on the shared browser:
+    one crawl for one URL, bounded-concurrency crawl_many() for several.
+    Yields (result, data) pairs, data being extracted_content parsed once (None if the
+    crawl failed). attempts > 1 retries each URL with backoff until it yields parsable JSON.
+    """
+    crawler = await get_crawler(BROWSER_CONFIG)
+    if len(urls) == 1:
+        yield await arun_with_retry(crawler, urls[0], crawler_config, attempts=attempts, parse=json_loads)
+        return
+
+    async for pair in crawl_many(crawler, urls, crawler_config, default_concurrency(urls),
+                                 attempts=attempts, parse=json_loads):
+        yield pair
+
+async def _save_extracted(extracted: List[tuple], output_file: str, single: bool, pretty: bool = False):
+    """
+    Save (result, data) pairs: for a single input URL the result is written exactly as the
+    crawler returned it, otherwise as a list of {"url", "data"} records (even if only one succeeded)
+    pretty indents the records; they are compact by default
+    """
+    if single:
+        await awrite_text(output_file, extracted[0][0].extracted_content)
+    else:
+        await adump_json([{"url": result.url, "data": data} for result, data in extracted], output_file, pretty=pretty)
+    print(f"💾 Saved to {output_file}")
+
+def _as_url_list(urls: Union[str, List[str]]) -> List[str]:
+    return [urls] if isinstance(urls, str) else list(urls)
+
 # =============================================================================
 # APPROACH 1: Generate Schema (Most Efficient for Repetitive Patterns)
 # =============================================================================
@@ -45,8 +99,6 @@ async def generate_schema(url: str, instruction: str, output_file: str = "genera
     """
     print("🔍 Generating extraction schema using LLM...")
 
-    browser_config = BrowserConfig(headless=True)
-
     # Use LLM to analyze the page structure and generate schema
     extraction_strategy = LLMExtractionStrategy(
         provider="openai/gpt-4o-mini",  # Can use any LLM provider
@@ -76,57 +128,41 @@ async def generate_schema(url: str, instruction: str, output_file: str = "genera
         remove_overlay_elements=True
     )
 
-    async with AsyncWebCrawler(config=browser_config) as crawler:
-        result = await crawler.arun(url=url, config=crawler_config)
-
-        if result.success and result.extracted_content:
-            try:
-                # Parse and save the generated schema
-                schema = json.loads(result.extracted_content)
-
-                # Validate and enhance schema
-                if "name" not in schema:
-                    schema["name"] = "items"
-                if "fields" not in schema:
-                    print("⚠️ Generated schema missing fields, using fallback")
-                    schema = {
-                        "name": "items",
-                        "baseSelector": "div.item, article, .product",
-                        "fields": [
-                            {"name": "title", "selector": "h1, h2, h3", "type": "text"},
-                            {"name": "description", "selector": "p", "type": "text"},
-                            {"name": "link", "selector": "a", "type": "attribute", "attribute": "href"}
-                        ]
-                    }
-
-                # Save schema
-                with open(output_file, "w") as f:
-                    json.dump(schema, f, indent=2)
-
-                print(f"✅ Schema generated and saved to: {output_file}")
-                print(f"📋 Schema structure:")
-                print(json.dumps(schema, indent=2))
-
-                return schema
-
-            except json.JSONDecodeError as e:
-                print(f"❌ Failed to parse generated schema: {e}")
-                print("Raw output:", result.extracted_content[:500])
-                return None
-        else:
-            print(f"❌ Failed to generate schema: {result.error_message if result else 'Unknown error'}")
-            return None
+    crawler = await get_crawler(BROWSER_CONFIG)
+    # Unparsable output is retried, then comes back as a failed result
+    result, schema = await arun_with_retry(crawler, url, crawler_config, attempts=LLM_ATTEMPTS, parse=json_loads)
+
+    if result.success and schema is not None:
+        # Validate and enhance schema
+        if "name" not in schema:
+            schema["name"] = "items"
+        if "fields" not in schema:
+            print("⚠️ Generated schema missing fields, using fallback")
+            schema = _FALLBACK_SCHEMA
+
+        # Save schema
+        await adump_json(schema, output_file)
+
+        print(f"✅ Schema generated and saved to: {output_file}")
+        print(f"📋 Schema structure:")
+        print(json.dumps(schema, indent=2))
 
-async def use_generated_schema(url: str, schema_file: str):
+        return schema
+    else:
+        print(f"❌ Failed to generate schema: {result.error_message if result else 'Unknown error'}")
+        return None
+
+async def use_generated_schema(urls: Union[str, List[str]], schema_file: str, pretty: bool = False):
     """
     Step 2: Use the generated schema for fast, repeated extractions
     No LLM calls needed - pure CSS extraction
+    Accepts one URL or a list; several URLs are crawled concurrently
     """
+    urls = _as_url_list(urls)
     print(f"📂 Loading schema from: {schema_file}")
 
     try:
-        with open(schema_file, "r") as f:
-            schema = json.load(f)
+        schema = json_loads(Path(schema_file).read_bytes())
     except FileNotFoundError:
         print(f"❌ Schema file not found: {schema_file}")
         print("💡 Generate a schema first using: python extraction_pipeline.py --generate-schema <url> \"<instruction>\"")
@@ -134,109 +170,92 @@ async def use_generated_schema(url: str, schema_file: str):
 
     print("🚀 Extracting data using generated schema (no LLM calls)...")
 
-    extraction_strategy = JsonCssExtractionStrategy(
-        schema=schema,
-        verbose=True
-    )
+    extraction_strategy = JsonCssExtractionStrategy(schema=schema, verbose=True)
 
     crawler_config = CrawlerRunConfig(
         extraction_strategy=extraction_strategy,
         wait_for="css:body"
     )
 
-    async with AsyncWebCrawler() as crawler:
-        result = await crawler.arun(url=url, config=crawler_config)
-
-        if result.success and result.extracted_content:
-            data = json.loads(result.extracted_content)
+    extracted = []
+    async for result, data in _extract(urls, crawler_config):
+        if result.success and data is not None:
             items = data.get(schema.get("name", "items"), [])
+            print(f"✅ Extracted {len(items)} items using schema from: {result.url}")
+            extracted.append((result, data))
+        else:
+            print(f"❌ Extraction failed for {result.url}: {result.error_message if result else 'Unknown error'}")
 
-            print(f"✅ Extracted {len(items)} items using schema")
+    if not extracted:
+        return None
 
-            # Save results
-            with open("extracted_data.json", "w") as f:
-                json.dump(data, f, indent=2)
-            print("💾 Saved to extracted_data.json")
+    await _save_extracted(extracted, "extracted_data.json", single=len(urls) == 1, pretty=pretty)
 
-            # Show sample
-            if items:
-                print("\n📋 Sample (first item):")
-                print(json.dumps(items[0], indent=2))
+    # Show sample
+    data = extracted[0][1]
+    items = data.get(schema.get("name", "items"), [])
+    if items:
+        print("\n📋 Sample (first item):")
+        print(json.dumps(items[0], indent=2))
 
-            return data
-        else:
-            print(f"❌ Extraction failed: {result.error_message if result else 'Unknown error'}")
-            return None
+    return data if len(urls) == 1 else [{"url": result.url, "data": data} for result, data in extracted]
 
 # =============================================================================
 # APPROACH 2: Manual Schema Definition
 # =============================================================================
 
-async def extract_with_manual_schema(url: str, schema: dict = None):
+async def extract_with_manual_schema(urls: Union[str, List[str]], schema: dict = None, pretty: bool = False):
     """
     Use a manually defined CSS/JSON schema
     Best for: When you know the exact structure of the website
+    Accepts one URL or a list; several URLs are crawled concurrently
     """
-
-    if not schema:
-        # Example schema for general content extraction
-        schema = {
-            "name": "content",
-            "baseSelector": "body",  # Changed from 'selector' to 'baseSelector'
-            "fields": [
-                {"name": "title", "selector": "h1", "type": "text"},
-                {"name": "paragraphs", "selector": "p", "type": "text", "all": True},
-                {"name": "links", "selector": "a", "type": "attribute", "attribute": "href", "all": True}
-            ]
-        }
+    urls = _as_url_list(urls)
+    schema = schema or _DEFAULT_MANUAL_SCHEMA
 
     print("📐 Using manual CSS/JSON schema for extraction...")
 
-    extraction_strategy = JsonCssExtractionStrategy(
-        schema=schema,
-        verbose=True
-    )
+    extraction_strategy = JsonCssExtractionStrategy(schema=schema, verbose=True)
 
     crawler_config = CrawlerRunConfig(
         extraction_strategy=extraction_strategy
     )
 
-    async with AsyncWebCrawler() as crawler:
-        result = await crawler.arun(url=url, config=crawler_config)
-
-        if result.success and result.extracted_content:
-            data = json.loads(result.extracted_content)
+    extracted = []
+    async for result, data in _extract(urls, crawler_config):
+        if result.success and data is not None:
             # Handle both list and dict formats
             if isinstance(data, list):
                 items = data
             else:
                 items = data.get(schema["name"], [])
 
-            print(f"✅ Extracted {len(items)} items using manual schema")
+            print(f"✅ Extracted {len(items)} items using manual schema from: {result.url}")
+            extracted.append((result, data))
+        else:
+            print(f"❌ Extraction failed for {result.url}")
+
+    if not extracted:
+        return None
 
-            with open("manual_extracted.json", "w") as f:
-                json.dump(data, f, indent=2)
-            print("💾 Saved to manual_extracted.json")
+    await _save_extracted(extracted, "manual_extracted.json", single=len(urls) == 1, pretty=pretty)
 
-            return data
-        else:
-            print(f"❌ Extraction failed")
-            return None
+    return extracted[0][1] if len(urls) == 1 else [{"url": result.url, "data": data} for result, data in extracted]
 
 # =============================================================================
 # APPROACH 3: Direct LLM Extraction
 # =============================================================================
 
-async def extract_with_llm(url: str, instruction: str):
+async def extract_with_llm(urls: Union[str, List[str]], instruction: str, pretty: bool = False):
     """
     Direct LLM extraction - uses LLM for every request
     Best for: Complex, irregular content or one-time extractions
     Note: Most expensive approach, use sparingly
+    Accepts one URL or a list; several URLs are crawled concurrently (still LLM rate-limited)
     """
+    urls = _as_url_list(urls)
     print("🤖 Using direct LLM extraction...")
 
-    browser_config = BrowserConfig(headless=True)
-
     extraction_strategy = LLMExtractionStrategy(
         provider="openai/gpt-4o-mini",  # Can change to ollama/llama3, anthropic/claude, etc.
         instruction=instruction,
@@ -258,61 +277,60 @@ async def extract_with_llm(url: str, instruction: str):
         remove_overlay_elements=True
     )
 
-    async with AsyncWebCrawler(config=browser_config) as crawler:
-        result = await crawler.arun(url=url, config=crawler_config)
+    extracted = []
+    # Output that still isn't JSON after the retries comes back as a failed result
+    async for result, data in _extract(urls, crawler_config, attempts=LLM_ATTEMPTS):
+        if result.success and data is not None:
+            items = data.get('items', [])
+            print(f"✅ LLM extracted {len(items)} items from: {result.url}")
+            print(f"📝 Summary: {data.get('summary', 'N/A')}")
+            extracted.append((result, data))
+        else:
+            print(f"❌ LLM extraction failed for {result.url}: {result.error_message}")
 
-        if result.success and result.extracted_content:
-            try:
-                data = json.loads(result.extracted_content)
-                items = data.get('items', [])
+    if not extracted:
+        return None
 
-                print(f"✅ LLM extracted {len(items)} items")
-                print(f"📝 Summary: {data.get('summary', 'N/A')}")
+    await _save_extracted(extracted, "llm_extracted.json", single=len(urls) == 1, pretty=pretty)
 
-                with open("llm_extracted.json", "w") as f:
-                    json.dump(data, f, indent=2)
-                print("💾 Saved to llm_extracted.json")
+    items = extracted[0][1].get('items', [])
+    if items:
+        print("\n📋 Sample (first item):")
+        print(json.dumps(items[0], indent=2))
 
-                if items:
-                    print("\n📋 Sample (first item):")
-                    print(json.dumps(items[0], indent=2))
-
-                return data
-            except json.JSONDecodeError:
-                print("⚠️ Could not parse LLM output as JSON")
-                print(result.extracted_content[:500])
-                return None
-        else:
-            print(f"❌ LLM extraction failed")
-            return None
+    return extracted[0][1] if len(urls) == 1 else [{"url": result.url, "data": data} for result, data in extracted]
 
 # =============================================================================
 # Main CLI Interface
 # =============================================================================
 
-async def main():
-    if len(sys.argv) < 3:
-        print("""
-Crawl4AI Extraction Pipeline - Three Approaches
-
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Crawl4AI Extraction Pipeline - Three Approaches",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
 1️⃣  GENERATE & USE SCHEMA (Most Efficient for Repetitive Patterns):
     Step 1: Generate schema (one-time LLM cost)
-    python extraction_pipeline.py --generate-schema <url> "<what to extract>"
+    python extraction_pipeline.py --generate-schema <url> "<what to extract>" [output.json]
 
     Step 2: Use schema for fast extraction (no LLM)
-    python extraction_pipeline.py --use-schema <url> generated_schema.json
+    python extraction_pipeline.py --use-schema <urls_or_file> generated_schema.json
 
 2️⃣  MANUAL SCHEMA (When You Know the Structure):
-    python extraction_pipeline.py --manual <url>
+    python extraction_pipeline.py --manual <urls_or_file>
     (Edit the schema in the script for your needs)
 
 3️⃣  DIRECT LLM (For Complex/Irregular Content):
-    python extraction_pipeline.py --llm <url> "<extraction instruction>"
+    python extraction_pipeline.py --llm <urls_or_file> "<extraction instruction>"
+
+<urls_or_file> is a URL, comma-separated URLs, or a file with one URL per line.
+Several URLs are crawled concurrently on one browser.
 
 Examples:
     # E-commerce products
     python extraction_pipeline.py --generate-schema https://shop.com "Extract all products with name, price, image"
     python extraction_pipeline.py --use-schema https://shop.com generated_schema.json
+    python extraction_pipeline.py --use-schema product_urls.txt generated_schema.json
 
     # News articles
     python extraction_pipeline.py --generate-schema https://news.com "Extract headlines, dates, and summaries"
@@ -320,43 +338,44 @@ Examples:
     # Complex content
     python extraction_pipeline.py --llm https://complex-site.com "Extract financial data and quarterly reports"
 """)
-        sys.exit(1)
-
-    mode = sys.argv[1]
-    url = sys.argv[2]
-
-    if mode == "--generate-schema":
-        if len(sys.argv) < 4:
-            print("Error: Missing extraction instruction")
-            print("Usage: python extraction_pipeline.py --generate-schema <url> \"<instruction>\"")
-            sys.exit(1)
-        instruction = sys.argv[3]
-        output_file = sys.argv[4] if len(sys.argv) > 4 else "generated_schema.json"
-        await generate_schema(url, instruction, output_file)
-
-    elif mode == "--use-schema":
-        if len(sys.argv) < 4:
-            print("Error: Missing schema file")
-            print("Usage: python extraction_pipeline.py --use-schema <url> <schema.json>")
-            sys.exit(1)
-        schema_file = sys.argv[3]
-        await use_generated_schema(url, schema_file)
-
-    elif mode == "--manual":
-        await extract_with_manual_schema(url)
-
-    elif mode == "--llm":
-        if len(sys.argv) < 4:
-            print("Error: Missing extraction instruction")
-            print("Usage: python extraction_pipeline.py --llm <url> \"<instruction>\"")
-            sys.exit(1)
-        instruction = sys.argv[3]
-        await extract_with_llm(url, instruction)
-
-    else:
-        print(f"Unknown mode: {mode}")
-        print("Use --generate-schema, --use-schema, --manual, or --llm")
-        sys.exit(1)
+    modes = parser.add_mutually_exclusive_group(required=True)
+    modes.add_argument("--generate-schema", dest="mode", action="store_const", const="generate-schema",
+                       help="Generate a reusable CSS schema with an LLM")
+    modes.add_argument("--use-schema", dest="mode", action="store_const", const="use-schema",
+                       help="Extract with a previously generated schema")
+    modes.add_argument("--manual", dest="mode", action="store_const", const="manual",
+                       help="Extract with the manual schema defined in this script")
+    modes.add_argument("--llm", dest="mode", action="store_const", const="llm",
+                       help="Extract directly with an LLM")
+    parser.add_argument("url", help="URL (--generate-schema) or URLs/URL file (other modes)")
+    parser.add_argument("arg", nargs="?", help="Instruction (--generate-schema, --llm) or schema file (--use-schema)")
+    parser.add_argument("output", nargs="?", default="generated_schema.json",
+                        help="Schema output file for --generate-schema (default: generated_schema.json)")
+    parser.add_argument("--pretty", action="store_true",
+                        help="Indent the extracted JSON output files (compact by default)")
+    args = parser.parse_args(argv)
+
+    if args.arg is None:
+        if args.mode in ("generate-schema", "llm"):
+            parser.error("missing extraction instruction")
+        if args.mode == "use-schema":
+            parser.error("missing schema file")
+    return args
+
+async def main(args: argparse.Namespace):
+    if args.mode == "generate-schema":
+        await generate_schema(args.url, args.arg, args.output)
+        return
+
+    # Extraction modes also take comma-separated URLs or a URL file
+    urls = list(load_urls(args.url))
+
+    if args.mode == "use-schema":
+        await use_generated_schema(urls, args.arg, pretty=args.pretty)
+    elif args.mode == "manual":
+        await extract_with_manual_schema(urls, pretty=args.pretty)
+    elif args.mode == "llm":
+        await extract_with_llm(urls, args.arg, pretty=args.pretty)
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run(main(parse_args()))
@@ -1,287 +1,563 @@
 #!/usr/bin/env python3
 """
 Google Search Scraper using Crawl4AI
-Usage: python google_search.py "<search query>" [max_results]
+Usage: python google_search.py "<search query>" [max_results] [--no-cache]
 
 Example: python google_search.py "2026年Go语言展望" 20
+
+Results are cached for SEARCH_CACHE_TTL seconds under ~/.cache/goclaw/google_search
+($XDG_CACHE_HOME is honoured); --no-cache forces a fresh search and refreshes the cache.
 """
 
+import argparse
 import asyncio
-import sys
+import functools
+import hashlib
+import itertools
+import os
 import json
+import random
+import re
+import sys
+import time
 import urllib.parse
-from typing import List, Dict
-
-try:
-    from crawl4ai.__version__ import __version__
-    from packaging import version
-    MIN_CRAWL4AI_VERSION = "0.7.4"
-    if version.parse(__version__) < version.parse(MIN_CRAWL4AI_VERSION):
-        print(f"⚠️  Warning: Crawl4AI {MIN_CRAWL4AI_VERSION}+ recommended (you have {__version__})")
-except ImportError:
-    print(f"ℹ️  Crawl4AI {MIN_CRAWL4AI_VERSION}+ required")
-
-from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig, CacheMode
+from pathlib import Path
+from urllib.parse import unquote
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# 搜索结果磁盘缓存：同一 (query, max_results) 在 TTL 内直接返回，不再打开浏览器
+# Crawl4AI 自身的缓存没有过期时间，所以抓取仍然使用 BYPASS，由这里控制新鲜度
+SEARCH_CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "goclaw" / "google_search"
+SEARCH_CACHE_TTL = 3600
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Google Search Scraper using Crawl4AI",
+        epilog="Example: python google_search.py \"2026年Go语言展望\" 20"
+    )
+    parser.add_argument("query", help="Search query")
+    parser.add_argument("max_results", nargs="?", type=int, default=20, help="Maximum number of results (default: 20)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help=f"Ignore cached results (cached for {SEARCH_CACHE_TTL}s) and search again")
+    parser.add_argument("--verbose", action="store_true", help="Log CSS extraction details")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    # 先解析参数：--help 和参数错误在导入 Crawl4AI（较慢）之前就退出
+    _ARGS = parse_args()
+
+# crawl_utils checks the Crawl4AI version on import
+from crawl_utils import (
+    RATE_LIMIT_BASE_DELAY, arun_many_dispatcher, awrite_bytes, default_concurrency, get_crawler, json_dumps,
+    json_loads, run
+)
+from crawl4ai import BrowserConfig, CrawlerRunConfig, CacheMode
 from crawl4ai.extraction_strategy import JsonCssExtractionStrategy, LLMExtractionStrategy
 
+# Google 重定向链接 /url?q=<目标>&...，取出 q 参数
+_GOOGLE_REDIR = re.compile(r"^/url\?(?:[^&]*&)*?q=([^&]+)")
+
+
+_UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# 模块级配置：get_crawler() 按配置对象缓存浏览器，所有搜索和备选方案共用一个浏览器
+# 只解析 HTML，不需要图片和网页字体：关闭它们以减少下载量和渲染时间
+# 不使用持久化配置目录：Crawl4AI 会为它在固定的 9222 调试端口上启动托管 Chrome，
+# 启动前结束占用该端口的进程（包括 goclaw 自己的浏览器和并发的搜索），还有固定的启动等待
+_SEARCH_BROWSER_CONFIG = BrowserConfig(
+    headless=True,
+    viewport_width=1280,
+    viewport_height=800,
+    user_agent=_UA,
+    extra_args=["--blink-settings=imagesEnabled=false", "--disable-remote-fonts"]
+)
+
+# 图片、字体和媒体用不到：在浏览器上下文层面按资源类型拦截，请求直接中止
+# 样式表保留：wait_for 等的是可见的结果标题，依赖页面正常渲染
+_BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font"})
+
+# 抓取搜索页（单个查询和 search_many 批量抓取共用）
+# DOM 加载完成即开始等待（不等网络空闲，Google 的统计请求会让 networkidle 多等几秒），
+# 第一个搜索结果标题出现即返回，不再固定等待；标题 5 秒内没出现就视为失败，交给备选方案
+# 只等 h3：结果容器随 Google 改版变化（见下方 schema 的四种容器），限定容器会让等待在新版页面上超时
+# page_timeout 限制异常页面的导航时间
+_SEARCH_RUN_CONFIG = CrawlerRunConfig(
+    cache_mode=CacheMode.BYPASS,
+    wait_until="domcontentloaded",
+    wait_for="css:h3",
+    wait_for_timeout=5000,
+    delay_before_return_html=0,
+    page_timeout=15000,
+    exclude_external_images=True
+)
+
+# 定义 Google 搜索结果的 CSS schema
+# Google 的 HTML 结构会变化，这里使用常用的选择器
+# data-hveid 也出现在“相关问题”等大量非结果区块上，只取包含 h3 的区块：
+# 每个基础节点都要对四个字段各做一次子树查询，少匹配一个区块就少四次查询
+_GOOGLE_SCHEMA = {
+    "name": "search_results",
+    "baseSelector": "div.g, div[data-hveid]:has(h3), div.tF2Cxc, div.yuRUbf",
+    "fields": [
+        {
+            "name": "title",
+            "selector": "h3, h3.LC20lb, div[role='heading']",
+            "type": "text"
+        },
+        {
+            "name": "link",
+            "selector": "a",
+            "type": "attribute",
+            "attribute": "href"
+        },
+        {
+            "name": "description",
+            "selector": "div.VwiC3b, div.s, div.ITZIwc, span.aCOpRe",
+            "type": "text"
+        },
+        {
+            "name": "site_name",
+            "selector": "div.NJo7tc, span.VuuXrf, cite",
+            "type": "text"
+        }
+    ]
+}
+
+# 提取策略在导入时构建一次，每次搜索复用；只有 --verbose 调试时另建一个带日志的实例
+_GOOGLE_STRATEGY = JsonCssExtractionStrategy(schema=_GOOGLE_SCHEMA)
+
+# LLM 备选方案的提示词模板：在模块加载时压缩一次空白，每次调用只填入参数，
+# 不再每次重建带缩进的整段字符串，也减少发送给 LLM 的 token
+_LLM_INSTRUCTION = re.sub(r"\s+", " ", """
+    Extract the top {max_results} search results from this Google search page for "{query}".
+
+    For each search result, extract:
+    1. Title - the blue link text
+    2. Link - the URL (clean the URL, remove /url?q= prefix if present)
+    3. Description - the gray text snippet below the title
+    4. Site name - the green text showing the website name
+
+    Return as JSON with a "results" array containing objects with these fields.
+    Skip any ads or sponsored content.
+""").strip()
+
+# search_many 同时加载的搜索页上限
+MAX_CONCURRENT_SEARCHES = 8
+
+# Google 每页返回的结果数（num 参数不再可靠），第一页不够时再逐页翻页（&start=N）
+RESULTS_PER_PAGE = 10
+
+
+def _cache_path(query: str, max_results: int) -> Path:
+    key = hashlib.blake2b(f"{query}|{max_results}".encode("utf-8"), digest_size=16).hexdigest()
+    return SEARCH_CACHE_DIR / f"{key}.json"
+
+
+def load_cached_results(query: str, max_results: int) -> Optional[List[Dict]]:
+    """返回 TTL 内的缓存结果，没有或已过期时返回 None"""
+    path = _cache_path(query, max_results)
+    try:
+        age = time.time() - path.stat().st_mtime
+        if age < SEARCH_CACHE_TTL:
+            results = json_loads(path.read_bytes())
+            print(f"⚡ Using cached results for: {query} ({int(age)}s old)")
+            return results
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def save_cached_results(query: str, max_results: int, results: List[Dict]):
+    path = _cache_path(query, max_results)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # 先写临时文件再替换，并发运行时不会读到写了一半的缓存
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_bytes(json_dumps(results))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"⚠️ Failed to write search cache: {e}")
+
+
+async def _block_static_resources(route):
+    if route.request.resource_type in _BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
 
-async def search_google_css(query: str, max_results: int = 20) -> List[Dict]:
+
+async def _on_page_context_created(page, context=None, **kwargs):
+    """每个浏览器上下文只注册一次拦截规则"""
+    if context is not None and not getattr(context, "_goclaw_blocks_static", False):
+        await context.route("**/*", _block_static_resources)
+        context._goclaw_blocks_static = True
+    return page
+
+
+async def get_search_crawler():
+    """
+    搜索专用的共享浏览器，页面只保留 HTML 和脚本请求
+    拦截只挂在这个浏览器上，其他脚本的抓取照常渲染
+    """
+    crawler = await get_crawler(_SEARCH_BROWSER_CONFIG)
+    crawler.crawler_strategy.set_hook("on_page_context_created", _on_page_context_created)
+    return crawler
+
+
+def build_search_url(query: str, max_results: int = 20) -> str:
+    return f"https://www.google.com/search?q={urllib.parse.quote(query)}&num={max_results}"
+
+
+def search_page_urls(search_url: str, max_results: int = 20) -> List[str]:
+    """凑够 max_results 需要的所有结果页 URL，第一页就是 search_url"""
+    return [search_url] + [f"{search_url}&start={start}"
+                           for start in range(RESULTS_PER_PAGE, max_results, RESULTS_PER_PAGE)]
+
+
+def merge_page_results(pages: Iterable[List[Dict]], max_results: int = 20) -> List[Dict]:
+    """按页序合并各页结果，按链接去重（相邻页可能有重叠）"""
+    merged = {}
+    for page in pages:
+        for r in page:
+            merged.setdefault(r.get("link"), r)
+    return list(merged.values())[:max_results]
+
+
+async def fetch_search_page(search_url: str):
+    """
+    抓取 Google 搜索页，CSS 提取和 HTML 解析共用这一次抓取
+    """
+
+    crawler = await get_search_crawler()
+    return await crawler.arun(url=search_url, config=_SEARCH_RUN_CONFIG)
+
+
+async def fetch_following_pages(search_url: str, first_page: List[Dict], max_results: int = 20,
+                                verbose: bool = False) -> List[Dict]:
+    """
+    第一页（num=max_results）不够 max_results 时逐页往后翻，每页之间按 RateLimiter 的默认间隔等待
+    上一页为空、超过一页的量（num 生效，已经是全部结果）、抓取失败或没有新链接时停止
+    """
+
+    results = merge_page_results([first_page], max_results)
+    last_page = first_page
+    for url in search_page_urls(search_url, max_results)[1:]:
+        if len(results) >= max_results or not last_page or len(last_page) > RESULTS_PER_PAGE:
+            break
+        await asyncio.sleep(random.uniform(*RATE_LIMIT_BASE_DELAY))
+        page = await fetch_search_page(url)
+        if not (page.success and page.html):
+            print(f"⚠️ Failed to fetch {url}: {page.error_message}")
+            break
+        last_page = await parse_search_page(page.html, url, max_results, verbose)
+        merged = merge_page_results([results, last_page], max_results)
+        if len(merged) == len(results):
+            break
+        results = merged
+    return results
+
+
+def parse_results_css(html: str, search_url: str, max_results: int = 20, verbose: bool = False) -> List[Dict]:
     """
     使用 CSS 选择器策略提取 Google 搜索结果（最快，无需 LLM）
+    verbose 会逐个节点打印提取日志，大页面上开销明显，默认关闭
+    """
+
+    # 直接在已抓取的 HTML 上运行提取策略，不再单独打开浏览器
+    strategy = JsonCssExtractionStrategy(schema=_GOOGLE_SCHEMA, verbose=True) if verbose else _GOOGLE_STRATEGY
+    results = strategy.extract(search_url, html)
+
+    # 过滤掉空结果和无效结果，按 URL 去重（dict 保持插入顺序，保留排名靠前的结果）
+    valid_results = {}
+    for r in results:
+        link = r.get("link")
+        if not (r.get("title") and link):
+            continue
+
+        # 清理 URL（Google 有时会在 URL 前加 /url?q=）
+        m = _GOOGLE_REDIR.match(link)
+        if m:
+            link = r["link"] = unquote(m.group(1))
+        valid_results.setdefault(link, r)
+
+    print(f"📋 Extracted {len(valid_results)} valid results")
+    return list(valid_results.values())[:max_results]
+
+
+# HTML 备选方案：Google 搜索结果通常在 div.g 中
+_HTML_CONTAINERS = "div.g, div.tF2Cxc"
+
+# 各字段的选择器；BeautifulSoup 路径逐个查询，selectolax 路径用下面等价的 _HTML_FIELDS 一次遍历
+_HTML_FIELD_SELECTORS = {
+    "title": "h3",
+    "link": "a",
+    "description": "div.VwiC3b, div.s, span.aCOpRe",
+    "site_name": "div.NJo7tc, span.VuuXrf, cite",
+}
+
+# HTML 解析要找的字段：标签 -> ((class 或 None, 字段名), ...)
+_HTML_FIELDS = {
+    "h3": ((None, "title"),),
+    "a": ((None, "link"),),
+    "div": (("VwiC3b", "description"), ("s", "description"), ("NJo7tc", "site_name")),
+    "span": (("aCOpRe", "description"), ("VuuXrf", "site_name")),
+    "cite": ((None, "site_name"),),
+}
+_FIELD_NAMES = {field for wanted in _HTML_FIELDS.values() for _, field in wanted}
+
+
+def _collect_fields(div) -> Dict:
+    """
+    一次遍历结果块的子树，为每个字段记录按文档顺序第一个匹配的节点，
+    四个字段都找到后提前结束，避免每个字段各自遍历一次子树
     """
+    found = {}
+    # traverse() 从节点自身开始；跳过结果块本身，避免容器的 class（如 div.g.s）被当成字段
+    for node in itertools.islice(div.traverse(), 1, None):
+        wanted = _HTML_FIELDS.get(node.tag)
+        if wanted is None:
+            continue
+
+        classes = None
+        for cls, field in wanted:
+            if field in found:
+                continue
+            if cls is not None:
+                if classes is None:
+                    classes = (node.attributes.get("class") or "").split()
+                if cls not in classes:
+                    continue
+            found[field] = node
+            break
 
-    # 构建搜索 URL
-    encoded_query = urllib.parse.quote(query)
-    search_url = f"https://www.google.com/search?q={encoded_query}&num={max_results}"
+        if len(found) == len(_FIELD_NAMES):
+            break
+    return found
 
-    print(f"🔍 Searching: {query}")
-    print(f"📊 Max results: {max_results}")
-    print(f"🌐 URL: {search_url}")
 
-    # 定义 Google 搜索结果的 CSS schema
-    # Google 的 HTML 结构会变化，这里使用常用的选择器
-    schema = {
-        "name": "search_results",
-        "baseSelector": "div.g, div[data-hveid], div.tF2Cxc, div.yuRUbf",
-        "fields": [
-            {
-                "name": "title",
-                "selector": "h3, h3.LC20lb, div[role='heading']",
-                "type": "text"
-            },
-            {
-                "name": "link",
-                "selector": "a",
-                "type": "attribute",
-                "attribute": "href"
-            },
-            {
-                "name": "description",
-                "selector": "div.VwiC3b, div.s, div.ITZIwc, span.aCOpRe",
-                "type": "text"
-            },
-            {
-                "name": "site_name",
-                "selector": "div.NJo7tc, span.VuuXrf, cite",
-                "type": "text"
+@functools.lru_cache(maxsize=None)
+def _lexbor_parser():
+    """selectolax 的 LexborHTMLParser；selectolax 是可选的加速依赖，未安装时返回 None（只检查一次）"""
+    try:
+        from selectolax.lexbor import LexborHTMLParser
+    except ImportError:
+        return None
+    return LexborHTMLParser
+
+
+def _lexbor_blocks(html: str) -> Iterator[Tuple[str, str, str, str]]:
+    """selectolax 路径：每个结果块只遍历一次子树，产出 (标题, 链接, 描述, 网站名称)"""
+    for div in _lexbor_parser()(html).css(_HTML_CONTAINERS):
+        fields = _collect_fields(div)
+        title, link, desc, site = (fields.get(name) for name in _HTML_FIELD_SELECTORS)
+        yield (title.text() if title else "",
+               (link.attributes.get("href") or "") if link else "",
+               desc.text() if desc else "",
+               site.text() if site else "")
+
+
+def _bs4_blocks(html: str) -> Iterator[Tuple[str, str, str, str]]:
+    """BeautifulSoup 路径（未安装 selectolax 时使用）：每个字段各做一次 select_one"""
+    from bs4 import BeautifulSoup  # Crawl4AI 的依赖，总是可用
+
+    for div in BeautifulSoup(html, "html.parser").select(_HTML_CONTAINERS):
+        title, link, desc, site = (div.select_one(selector) for selector in _HTML_FIELD_SELECTORS.values())
+        yield (title.get_text() if title else "",
+               (link.get("href") or "") if link else "",
+               desc.get_text() if desc else "",
+               site.get_text() if site else "")
+
+
+def parse_results_html(html: str, max_results: int = 20) -> List[Dict]:
+    """
+    直接解析 HTML 作为备选方案
+    优先使用 selectolax；未安装时退回 BeautifulSoup（较慢，但随 Crawl4AI 一起安装）
+    """
+
+    blocks = _lexbor_blocks(html) if _lexbor_parser() is not None else _bs4_blocks(html)
+    # 按链接去重：div.g 里常嵌套 div.tF2Cxc，同一条结果会匹配两次（dict 保持插入顺序）
+    results = {}
+
+    for title, link, description, site_name in blocks:
+        # 清理 Google 重定向链接
+        m = _GOOGLE_REDIR.match(link)
+        if m:
+            link = unquote(m.group(1))
+
+        link = link.strip()
+        if title and link and not link.startswith('#') and link not in results:
+            results[link] = {
+                "title": title.strip(),
+                "link": link,
+                "description": description.strip(),
+                "site_name": site_name.strip()
             }
-        ]
-    }
-
-    browser_config = BrowserConfig(
-        headless=True,
-        viewport_width=1920,
-        viewport_height=1080,
-        user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-    )
 
-    crawler_config = CrawlerRunConfig(
-        extraction_strategy=JsonCssExtractionStrategy(schema=schema, verbose=True),
-        cache_mode=CacheMode.BYPASS,
-        wait_for="css:div.g, div.search, body",
-        page_timeout=30000,
-        js_code=[
-            # 等待页面加载完成
-            "const waitFor = (ms) => new Promise(resolve => setTimeout(resolve, ms));",
-            "await waitFor(2000);"
-        ]
-    )
+            if len(results) >= max_results:
+                break
 
-    async with AsyncWebCrawler(config=browser_config) as crawler:
-        result = await crawler.arun(url=search_url, config=crawler_config)
-
-        if result.success:
-            print("✅ Successfully fetched search results")
-
-            if result.extracted_content:
-                try:
-                    data = json.loads(result.extracted_content)
-                    # 处理列表和字典两种格式
-                    if isinstance(data, list):
-                        results = data
-                    else:
-                        results = data.get("search_results", data.get("results", []))
-
-                    # 过滤掉空结果和无效结果
-                    seen = set()
-                    valid_results = []
-                    for r in results:
-                        if r.get("title") and r.get("link"):
-                            # 清理 URL（Google 有时会在 URL 前加 /url?q=）
-                            link = r["link"]
-                            if link.startswith("/url?q="):
-                                from urllib.parse import urlparse, parse_qs
-                                parsed = urlparse(link)
-                                link = parse_qs(parsed.query).get("q", [link])[0]
-                            r["link"] = link
-
-                            # 使用 URL 作为唯一标识去重
-                            if link not in seen:
-                                seen.add(link)
-                                valid_results.append(r)
-
-                    print(f"📋 Extracted {len(valid_results)} valid results")
-                    return valid_results[:max_results]
-
-                except json.JSONDecodeError as e:
-                    print(f"❌ Failed to parse extracted content: {e}")
-                    print("Raw output:", result.extracted_content[:500] if result.extracted_content else "None")
-                    return []
-            else:
-                print("⚠️ No extracted content, trying alternative method...")
-                return await search_google_llm_fallback(query, max_results)
-        else:
-            print(f"❌ Failed: {result.error_message}")
-            print("Trying fallback method...")
-            return await search_google_llm_fallback(query, max_results)
+    print(f"📋 Parsed {len(results)} results from HTML")
+    return list(results.values())
 
 
-async def search_google_llm_fallback(query: str, max_results: int = 20) -> List[Dict]:
+async def search_google_llm_fallback(search_url: str, query: str, max_results: int = 20) -> List[Dict]:
     """
     使用 LLM 作为备选方案提取搜索结果
-    注意：这需要配置 LLM API 密钥
+    注意：这需要配置 LLM API 密钥（OPENAI_API_KEY 或 LLM_API_KEY），未设置时直接跳过
     """
 
-    print("🤖 Using LLM fallback extraction...")
+    # 没有配置 API 密钥时直接跳过，避免为一个必然失败的调用启动浏览器
+    if not os.getenv("OPENAI_API_KEY") and not os.getenv("LLM_API_KEY"):
+        print("⏭️  Skipping LLM fallback (no OPENAI_API_KEY or LLM_API_KEY set)")
+        return []
 
-    encoded_query = urllib.parse.quote(query)
-    search_url = f"https://www.google.com/search?q={encoded_query}&num={max_results}"
+    print("🤖 Using LLM fallback extraction...")
 
-    # 尝试使用简单的 LLM 提取
+    # 尝试使用简单的 LLM 提取，每次只填入参数
     extraction_strategy = LLMExtractionStrategy(
         provider="openai/gpt-4o-mini",
-        instruction=f"""
-        Extract the top {max_results} search results from this Google search page for "{query}".
-
-        For each search result, extract:
-        1. Title - the blue link text
-        2. Link - the URL (clean the URL, remove /url?q= prefix if present)
-        3. Description - the gray text snippet below the title
-        4. Site name - the green text showing the website name
-
-        Return as JSON with a "results" array containing objects with these fields.
-        Skip any ads or sponsored content.
-        """
+        instruction=_LLM_INSTRUCTION.format(max_results=max_results, query=query)
     )
 
-    crawler_config = CrawlerRunConfig(
+    # 基于共用的抓取配置；不等待结果标题（走到这里通常是因为它们没有出现），给 LLM 更长的超时
+    crawler_config = _SEARCH_RUN_CONFIG.clone(
         extraction_strategy=extraction_strategy,
-        cache_mode=CacheMode.BYPASS,
+        wait_for=None,
         page_timeout=30000
     )
 
-    async with AsyncWebCrawler() as crawler:
-        result = await crawler.arun(url=search_url, config=crawler_config)
+    crawler = await get_search_crawler()
+    result = await crawler.arun(url=search_url, config=crawler_config)
 
-        if result.success and result.extracted_content:
-            try:
-                data = json.loads(result.extracted_content)
-                return data.get("results", [])
-            except json.JSONDecodeError:
-                print("⚠️ LLM output could not be parsed as JSON")
-                return []
-        else:
-            print(f"❌ Fallback also failed: {result.error_message}")
+    if result.success and result.extracted_content:
+        try:
+            data = json_loads(result.extracted_content)
+            return data.get("results", [])
+        except json.JSONDecodeError:
+            print("⚠️ LLM output could not be parsed as JSON")
             return []
+    else:
+        print(f"❌ Fallback also failed: {result.error_message}")
+        return []
 
 
-async def search_google_with_html_parsing(query: str, max_results: int = 20) -> List[Dict]:
+async def search_google(query: str, max_results: int = 20, use_cache: bool = True,
+                        verbose: bool = False, search_url: Optional[str] = None) -> List[Dict]:
     """
-    直接解析 HTML 作为最后的备选方案
+    抓取一次搜索页，先用 CSS 提取，没有结果时再直接解析同一份 HTML；第一页不够时再逐页翻页
+    两者都没有结果时再尝试 LLM 提取
+    use_cache 为 True 时先查磁盘缓存；非空的新结果总是写回缓存（--no-cache 也会刷新缓存）
+    search_url 可由调用方预先用 build_search_url() 构建，各策略共用同一个 URL
     """
 
-    print("🔧 Using direct HTML parsing...")
-
-    encoded_query = urllib.parse.quote(query)
-    search_url = f"https://www.google.com/search?q={encoded_query}&num={max_results}"
+    if use_cache:
+        results = load_cached_results(query, max_results)
+        if results is not None:
+            return results
 
-    browser_config = BrowserConfig(
-        headless=True,
-        viewport_width=1920,
-        viewport_height=1080,
-        user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-    )
+    results = await _search_google(search_url or build_search_url(query, max_results), query, max_results, verbose)
+    if results:
+        save_cached_results(query, max_results, results)
+    return results
 
-    crawler_config = CrawlerRunConfig(
-        cache_mode=CacheMode.BYPASS,
-        wait_for="css:body",
-        page_timeout=30000,
-        js_code=[
-            "const waitFor = (ms) => new Promise(resolve => setTimeout(resolve, ms));",
-            "await waitFor(3000);"
-        ]
-    )
 
-    async with AsyncWebCrawler(config=browser_config) as crawler:
-        result = await crawler.arun(url=search_url, config=crawler_config)
+async def _search_google(search_url: str, query: str, max_results: int = 20, verbose: bool = False) -> List[Dict]:
+    print(f"🔍 Searching: {query}")
+    print(f"📊 Max results: {max_results}")
+    print(f"🌐 URL: {search_url}")
 
-        if result.success and result.html:
-            from bs4 import BeautifulSoup
+    result = await fetch_search_page(search_url)
+    if result.success and result.html:
+        print("✅ Successfully fetched search results")
 
-            soup = BeautifulSoup(result.html, 'html.parser')
-            results = []
+        first_page = await parse_search_page(result.html, search_url, max_results, verbose)
+        results = await fetch_following_pages(search_url, first_page, max_results, verbose)
+        if results:
+            return results
 
-            # Google 搜索结果通常在 div.g 中
-            for div in soup.select('div.g, div.tF2Cxc'):
-                try:
-                    # 提取标题
-                    title_elem = div.select_one('h3')
-                    title = title_elem.get_text() if title_elem else ""
+        print("⚠️ No results parsed, trying alternative method...")
+    else:
+        print(f"❌ Failed: {result.error_message}")
+        print("Trying fallback method...")
 
-                    # 提取链接
-                    link_elem = div.select_one('a')
-                    link = link_elem.get('href', '') if link_elem else ""
+    return await search_google_llm_fallback(search_url, query, max_results)
 
-                    # 清理 Google 重定向链接
-                    if link.startswith('/url?q='):
-                        from urllib.parse import urlparse, parse_qs, unquote
-                        parsed = urlparse(link)
-                        link = unquote(parse_qs(parsed.query).get('q', [link])[0])
 
-                    # 提取描述
-                    desc_elem = div.select_one('div.VwiC3b, div.s, span.aCOpRe')
-                    description = desc_elem.get_text() if desc_elem else ""
+async def parse_search_page(html: str, search_url: str, max_results: int = 20,
+                            verbose: bool = False) -> List[Dict]:
+    """
+    先用 CSS 提取，没有结果时再直接解析同一份 HTML
+    """
 
-                    # 提取网站名称
-                    site_elem = div.select_one('div.NJo7tc, span.VuuXrf, cite')
-                    site_name = site_elem.get_text() if site_elem else ""
+    # 解析器都是纯 CPU 操作，放到线程中运行，不阻塞其他页面的抓取
+    results = await asyncio.to_thread(parse_results_css, html, search_url, max_results, verbose)
+    if results:
+        return results
+    return await asyncio.to_thread(parse_results_html, html, max_results)
 
-                    if title and link and not link.startswith('#'):
-                        results.append({
-                            "title": title.strip(),
-                            "link": link.strip(),
-                            "description": description.strip(),
-                            "site_name": site_name.strip()
-                        })
 
-                        if len(results) >= max_results:
-                            break
+async def search_many(queries: List[str], max_results: int = 20, use_cache: bool = True,
+                      verbose: bool = False) -> Dict[str, List[Dict]]:
+    """
+    用一次 arun_many 批量抓取多个查询的第一页，共用一个浏览器并发加载
+    结果不够的查询再逐个顺序翻页；返回 {query: results}，解析不出结果的查询再逐个尝试 LLM 提取
+    use_cache 为 True 时只抓取磁盘缓存中没有的查询；非空的新结果总是写回缓存
+    """
 
-                except Exception as e:
-                    continue
+    results = {}
+    if use_cache:
+        for query in queries:
+            cached = load_cached_results(query, max_results)
+            if cached is not None:
+                results[query] = cached
+
+    # 相同的查询只抓取一次
+    url_to_query = {build_search_url(query, max_results): query for query in queries if query not in results}
+    if not url_to_query:
+        return {query: results[query] for query in queries}
+
+    crawler = await get_search_crawler()
+    pages = await crawler.arun_many(
+        urls=list(url_to_query),
+        config=_SEARCH_RUN_CONFIG,
+        dispatcher=arun_many_dispatcher(min(default_concurrency(url_to_query), MAX_CONCURRENT_SEARCHES))
+    )
 
-            print(f"📋 Parsed {len(results)} results from HTML")
-            return results
+    first_pages = {}
+    for page in pages:
+        query = url_to_query.get(page.url)
+        if query is None:
+            continue
+        if page.success and page.html:
+            first_pages[page.url] = await parse_search_page(page.html, page.url, max_results, verbose)
         else:
-            print(f"❌ HTML parsing failed")
-            return []
-
+            print(f"❌ {query}: {page.error_message}")
+
+    for search_url, query in url_to_query.items():
+        # 翻页都打到 google.com，逐个查询顺序进行，不再并发
+        results[query] = await fetch_following_pages(search_url, first_pages.get(search_url, []),
+                                                     max_results, verbose)
+        if results[query]:
+            print(f"✅ {query}: {len(results[query])} results")
+        else:
+            results[query] = await search_google_llm_fallback(search_url, query, max_results)
+        if results[query]:
+            save_cached_results(query, max_results, results[query])
 
-async def main():
-    if len(sys.argv) < 2:
-        print("Usage: python google_search.py \"<search query>\" [max_results]")
-        print("Example: python google_search.py \"2026年Go语言展望\" 20")
-        sys.exit(1)
+    return {query: results[query] for query in queries}
 
-    query = sys.argv[1]
-    max_results = int(sys.argv[2]) if len(sys.argv) > 2 else 20
 
-    # 方法1: CSS 提取
-    results = await search_google_css(query, max_results)
+async def main(args: argparse.Namespace):
+    query = args.query
+    max_results = args.max_results
 
-    # 如果 CSS 提取失败，尝试 HTML 解析
-    if not results:
-        results = await search_google_with_html_parsing(query, max_results)
+    # 抓取一次，CSS 提取和 HTML 解析共用抓取结果，失败时尝试 LLM
+    # 搜索 URL 只构建一次，所有策略共用
+    search_url = build_search_url(query, max_results)
+    results = await search_google(query, max_results, use_cache=not args.no_cache, verbose=args.verbose,
+                                  search_url=search_url)
 
     # 输出结果
     if results:
@@ -291,30 +567,42 @@ async def main():
             "results": results
         }
 
-        print("\n" + "="*60)
-        print(f"✅ Successfully extracted {len(results)} search results")
-        print("="*60)
+        # 只序列化一次：同一份字节写入文件并输出到 stdout
+        payload = json_dumps(output, pretty=True)
 
         # 保存到文件
         output_file = "google_search_results.json"
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(output, f, ensure_ascii=False, indent=2)
-
-        print(f"\n💾 Results saved to: {output_file}")
-        print("\n📋 Preview (first 3 results):")
-        print(json.dumps(results[:3], ensure_ascii=False, indent=2))
-
-        # 打印完整 JSON 到 stdout
-        print("\n" + "="*60)
-        print("FULL JSON OUTPUT:")
-        print("="*60)
-        print(json.dumps(output, ensure_ascii=False, indent=2))
+        await awrite_bytes(output_file, payload)
+
+        # 摘要、预览和完整 JSON 先拼接好，再一次写入 stdout
+        rule = "=" * 60
+        header = (
+            f"\n{rule}\n"
+            f"✅ Successfully extracted {len(results)} search results\n"
+            f"{rule}\n"
+            f"\n💾 Results saved to: {output_file}\n"
+            f"\n📋 Preview (first 3 results):\n"
+        )
+        full_json_header = f"\n\n{rule}\nFULL JSON OUTPUT:\n{rule}\n"
+        out = b"".join((
+            header.encode("utf-8"),
+            json_dumps(results[:3], pretty=True),
+            full_json_header.encode("utf-8"),
+            payload,
+            b"\n"
+        ))
     else:
-        print("❌ No results extracted. Please check:")
-        print("  1. Your internet connection")
-        print("  2. Whether Google is blocking the request (try with headless=False)")
-        print("  3. The CSS selectors (Google might have changed their HTML)")
+        out = (
+            "❌ No results extracted. Please check:\n"
+            "  1. Your internet connection\n"
+            "  2. Whether Google is blocking the request (try with headless=False)\n"
+            "  3. The CSS selectors (Google might have changed their HTML)\n"
+        ).encode("utf-8")
+
+    sys.stdout.flush()
+    sys.stdout.buffer.write(out)
+    sys.stdout.buffer.flush()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run(main(_ARGS))
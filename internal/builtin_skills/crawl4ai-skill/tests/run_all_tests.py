@@ -1,41 +1,57 @@
 #!/usr/bin/env python3
 """
 Run all skill tests
+Test modules are imported and run in this process under one event loop,
+so Crawl4AI is imported and each browser is launched only once
 """
-import subprocess
+import importlib
 import sys
+import traceback
 from pathlib import Path
 
-def run_test(test_file):
-    """Run a single test file"""
+TEST_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(TEST_DIR))
+sys.path.insert(0, str(TEST_DIR.parent / "scripts"))
+from crawl_utils import run
+
+async def run_test(test_file):
+    """Run a single test file's main() on the shared event loop"""
     print(f"\n{'='*60}")
     print(f"Running: {test_file}")
     print('='*60)
 
-    result = subprocess.run(
-        [sys.executable, test_file],
-        capture_output=False
-    )
+    try:
+        module = importlib.import_module(Path(test_file).stem)
+        await module.main()
+    except Exception:
+        traceback.print_exc()
+        return False
+
+    return True
 
-    return result.returncode == 0
+async def run_tests(test_files):
+    results = {}
+    for test_file in test_files:
+        test_path = TEST_DIR / test_file
+        if test_path.exists():
+            results[test_file] = await run_test(str(test_path))
+        else:
+            print(f"⚠️  Test file not found: {test_file}")
+            results[test_file] = False
+    return results
 
 def main():
-    test_dir = Path(__file__).parent
     test_files = [
         "test_basic_crawling.py",
         "test_markdown_generation.py",
         "test_data_extraction.py",
-        "test_advanced_patterns.py"
+        "test_advanced_patterns.py",
+        "test_offline_helpers.py"
     ]
 
-    results = {}
-    for test_file in test_files:
-        test_path = test_dir / test_file
-        if test_path.exists():
-            results[test_file] = run_test(str(test_path))
-        else:
-            print(f"⚠️  Test file not found: {test_file}")
-            results[test_file] = False
+    # One event loop for every test file, so crawlers started by one file are
+    # reused by the next and closed once at the end
+    results = run(run_tests(test_files))
 
     # Summary
     print(f"\n{'='*60}")
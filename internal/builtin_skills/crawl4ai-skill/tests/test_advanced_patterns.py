@@ -3,28 +3,36 @@
 Test advanced patterns from SKILL.md
 """
 import asyncio
-from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig
+import sys
+from pathlib import Path
+from crawl4ai import BrowserConfig, CrawlerRunConfig
+
+# Tests share the skill scripts' crawler cache so a run launches one browser
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+from crawl_utils import arun_many_dispatcher, default_concurrency, get_crawler, run
 
 async def test_session_management():
     """Test session management"""
     print("Testing session management...")
 
-    async with AsyncWebCrawler() as crawler:
-        session_id = "test_session"
+    crawler = await get_crawler()
+    # Sequential on purpose: both crawls share one session (one browser page),
+    # so batching them through arun_many would defeat what is being tested
+    session_id = "test_session"
 
-        # First crawl with session
-        config1 = CrawlerRunConfig(session_id=session_id)
-        result1 = await crawler.arun("https://example.com", config=config1)
+    # First crawl with session
+    config1 = CrawlerRunConfig(session_id=session_id)
+    result1 = await crawler.arun("https://example.com", config=config1)
 
-        assert result1.success, f"First crawl failed: {result1.error_message}"
+    assert result1.success, f"First crawl failed: {result1.error_message}"
 
-        # Second crawl reusing session
-        config2 = CrawlerRunConfig(session_id=session_id)
-        result2 = await crawler.arun("https://example.org", config=config2)
+    # Second crawl reusing session
+    config2 = CrawlerRunConfig(session_id=session_id)
+    result2 = await crawler.arun("https://example.org", config=config2)
 
-        assert result2.success, f"Second crawl failed: {result2.error_message}"
+    assert result2.success, f"Second crawl failed: {result2.error_message}"
 
-        print(f"✅ Session management works")
+    print(f"✅ Session management works")
 
 async def test_proxy_config():
     """Test proxy configuration in BrowserConfig"""
@@ -48,25 +56,29 @@ async def test_batch_crawling():
 
     urls = ["https://example.com", "https://example.org"]
 
-    async with AsyncWebCrawler() as crawler:
-        results = await crawler.arun_many(
-            urls=urls,
-            max_concurrent=2
-        )
+    crawler = await get_crawler()
+    results = await crawler.arun_many(
+        urls=urls,
+        dispatcher=arun_many_dispatcher(default_concurrency(urls))
+    )
 
-        assert len(results) == 2, f"Expected 2 results, got {len(results)}"
+    assert len(results) == 2, f"Expected 2 results, got {len(results)}"
 
-        for result in results:
-            if result.success:
-                print(f"✅ {result.url}: Success")
-            else:
-                print(f"⚠️ {result.url}: {result.error_message}")
+    for result in results:
+        if result.success:
+            print(f"✅ {result.url}: Success")
+        else:
+            print(f"⚠️ {result.url}: {result.error_message}")
 
 async def main():
-    await test_session_management()
-    await test_proxy_config()
-    await test_batch_crawling()
+    # Independent tests on the shared crawler: run them concurrently
+    # (each test's own steps stay in order)
+    await asyncio.gather(
+        test_session_management(),
+        test_proxy_config(),
+        test_batch_crawling()
+    )
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run(main())
     print("\n✅ All advanced pattern tests passed!")
@@ -2,8 +2,13 @@
 """
 Test basic crawling examples from SKILL.md
 """
-import asyncio
-from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig
+import sys
+from pathlib import Path
+from crawl4ai import BrowserConfig, CrawlerRunConfig
+
+# Tests share the skill scripts' crawler cache so a run launches one browser
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+from crawl_utils import get_crawler, run
 
 async def test_basic_crawl():
     """Test basic crawling setup"""
@@ -23,27 +28,30 @@ async def test_basic_crawl():
         remove_overlay_elements=True
     )
 
-    async with AsyncWebCrawler(config=browser_config) as crawler:
-        result = await crawler.arun(
-            url="https://example.com",
-            config=crawler_config
-        )
+    crawler = await get_crawler(browser_config)
+    result = await crawler.arun(
+        url="https://example.com",
+        config=crawler_config
+    )
+
+    # Verify result attributes
+    assert result.success, f"Crawl failed: {result.error_message}"
+    assert hasattr(result, 'html'), "Missing html attribute"
+    assert hasattr(result, 'markdown'), "Missing markdown attribute"
+    assert hasattr(result, 'links'), "Missing links attribute"
 
-        # Verify result attributes
-        assert result.success, f"Crawl failed: {result.error_message}"
-        assert hasattr(result, 'html'), "Missing html attribute"
-        assert hasattr(result, 'markdown'), "Missing markdown attribute"
-        assert hasattr(result, 'links'), "Missing links attribute"
+    # Test markdown as string (StringCompatibleMarkdown)
+    markdown_str = str(result.markdown)
+    assert len(markdown_str) > 0, "Markdown is empty"
 
-        # Test markdown as string (StringCompatibleMarkdown)
-        markdown_str = str(result.markdown)
-        assert len(markdown_str) > 0, "Markdown is empty"
+    print(f"✅ Success: {result.success}")
+    print(f"✅ HTML length: {len(result.html)}")
+    print(f"✅ Markdown length: {len(markdown_str)}")
+    print(f"✅ Links found: {len(result.links)}")
 
-        print(f"✅ Success: {result.success}")
-        print(f"✅ HTML length: {len(result.html)}")
-        print(f"✅ Markdown length: {len(markdown_str)}")
-        print(f"✅ Links found: {len(result.links)}")
+async def main():
+    await test_basic_crawl()
 
 if __name__ == "__main__":
-    asyncio.run(test_basic_crawl())
+    run(main())
     print("\n✅ All basic crawling tests passed!")
@@ -4,9 +4,15 @@ Test data extraction examples from SKILL.md
 """
 import asyncio
 import json
-from crawl4ai import AsyncWebCrawler, CrawlerRunConfig
+import sys
+from pathlib import Path
+from crawl4ai import CrawlerRunConfig
 from crawl4ai.extraction_strategy import JsonCssExtractionStrategy, LLMExtractionStrategy
 
+# Tests share the skill scripts' crawler cache so a run launches one browser
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+from crawl_utils import get_crawler, run
+
 async def test_manual_schema_extraction():
     """Test manual CSS/JSON schema extraction"""
     print("Testing manual schema extraction...")
@@ -24,17 +30,17 @@ async def test_manual_schema_extraction():
     extraction_strategy = JsonCssExtractionStrategy(schema=schema)
     config = CrawlerRunConfig(extraction_strategy=extraction_strategy)
 
-    async with AsyncWebCrawler() as crawler:
-        result = await crawler.arun("https://example.com", config=config)
+    crawler = await get_crawler()
+    result = await crawler.arun("https://example.com", config=config)
 
-        assert result.success, f"Crawl failed: {result.error_message}"
-        assert result.extracted_content, "No extracted content"
+    assert result.success, f"Crawl failed: {result.error_message}"
+    assert result.extracted_content, "No extracted content"
 
-        data = json.loads(result.extracted_content)
-        assert isinstance(data, list) or isinstance(data, dict), "Invalid extraction format"
+    data = json.loads(result.extracted_content)
+    assert isinstance(data, list) or isinstance(data, dict), "Invalid extraction format"
 
-        print(f"✅ Manual schema extraction works")
-        print(f"   Extracted data type: {type(data)}")
+    print(f"✅ Manual schema extraction works")
+    print(f"   Extracted data type: {type(data)}")
 
 async def test_llm_extraction():
     """Test LLM-based extraction (requires API key in env)"""
@@ -54,9 +60,12 @@ async def test_llm_extraction():
         print(f"✅ LLMExtractionStrategy structure verified (API key not tested)")
 
 async def main():
-    await test_manual_schema_extraction()
-    await test_llm_extraction()
+    # Independent tests on the shared crawler: run them concurrently
+    await asyncio.gather(
+        test_manual_schema_extraction(),
+        test_llm_extraction()
+    )
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run(main())
     print("\n✅ All data extraction tests passed!")
@@ -3,21 +3,27 @@
 Test markdown generation examples from SKILL.md
 """
 import asyncio
-from crawl4ai import AsyncWebCrawler, CrawlerRunConfig
+import sys
+from pathlib import Path
+from crawl4ai import CrawlerRunConfig
 from crawl4ai.content_filter_strategy import PruningContentFilter, BM25ContentFilter
 from crawl4ai.markdown_generation_strategy import DefaultMarkdownGenerator
 
+# Tests share the skill scripts' crawler cache so a run launches one browser
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+from crawl_utils import get_crawler, run
+
 async def test_basic_markdown():
     """Test basic markdown extraction"""
     print("Testing basic markdown extraction...")
 
-    async with AsyncWebCrawler() as crawler:
-        result = await crawler.arun("https://example.com")
+    crawler = await get_crawler()
+    result = await crawler.arun("https://example.com")
 
-        # result.markdown is StringCompatibleMarkdown
-        markdown_str = str(result.markdown)
-        assert len(markdown_str) > 0, "Markdown is empty"
-        print(f"✅ Basic markdown length: {len(markdown_str)}")
+    # result.markdown is StringCompatibleMarkdown
+    markdown_str = str(result.markdown)
+    assert len(markdown_str) > 0, "Markdown is empty"
+    print(f"✅ Basic markdown length: {len(markdown_str)}")
 
 async def test_fit_markdown_with_filters():
     """Test Fit Markdown with content filters"""
@@ -32,15 +38,15 @@ async def test_fit_markdown_with_filters():
     md_generator = DefaultMarkdownGenerator(content_filter=bm25_filter)
     config = CrawlerRunConfig(markdown_generator=md_generator)
 
-    async with AsyncWebCrawler() as crawler:
-        result = await crawler.arun("https://example.com", config=config)
+    crawler = await get_crawler()
+    result = await crawler.arun("https://example.com", config=config)
 
-        # Access both raw and fit markdown
-        assert hasattr(result.markdown, 'raw_markdown'), "Missing raw_markdown attribute"
-        assert hasattr(result.markdown, 'fit_markdown'), "Missing fit_markdown attribute"
+    # Access both raw and fit markdown
+    assert hasattr(result.markdown, 'raw_markdown'), "Missing raw_markdown attribute"
+    assert hasattr(result.markdown, 'fit_markdown'), "Missing fit_markdown attribute"
 
-        print(f"✅ Raw markdown length: {len(result.markdown.raw_markdown)}")
-        print(f"✅ Fit markdown length: {len(result.markdown.fit_markdown or '')}")
+    print(f"✅ Raw markdown length: {len(result.markdown.raw_markdown)}")
+    print(f"✅ Fit markdown length: {len(result.markdown.fit_markdown or '')}")
 
 async def test_pruning_filter():
     """Test Pruning filter"""
@@ -50,11 +56,11 @@ async def test_pruning_filter():
     md_generator = DefaultMarkdownGenerator(content_filter=pruning_filter)
     config = CrawlerRunConfig(markdown_generator=md_generator)
 
-    async with AsyncWebCrawler() as crawler:
-        result = await crawler.arun("https://example.com", config=config)
+    crawler = await get_crawler()
+    result = await crawler.arun("https://example.com", config=config)
 
-        assert result.success, f"Crawl failed: {result.error_message}"
-        print(f"✅ Pruning filter works")
+    assert result.success, f"Crawl failed: {result.error_message}"
+    print(f"✅ Pruning filter works")
 
 async def test_markdown_options():
     """Test markdown generator options"""
@@ -70,18 +76,21 @@ async def test_markdown_options():
 
     config = CrawlerRunConfig(markdown_generator=generator)
 
-    async with AsyncWebCrawler() as crawler:
-        result = await crawler.arun("https://example.com", config=config)
+    crawler = await get_crawler()
+    result = await crawler.arun("https://example.com", config=config)
 
-        assert result.success, f"Crawl failed: {result.error_message}"
-        print(f"✅ Markdown options work")
+    assert result.success, f"Crawl failed: {result.error_message}"
+    print(f"✅ Markdown options work")
 
 async def main():
-    await test_basic_markdown()
-    await test_fit_markdown_with_filters()
-    await test_pruning_filter()
-    await test_markdown_options()
+    # Independent tests on the shared crawler: run them concurrently
+    await asyncio.gather(
+        test_basic_markdown(),
+        test_fit_markdown_with_filters(),
+        test_pruning_filter(),
+        test_markdown_options()
+    )
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run(main())
     print("\n✅ All markdown generation tests passed!")
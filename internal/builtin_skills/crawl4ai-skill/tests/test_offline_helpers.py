@@ -0,0 +1,520 @@
+#!/usr/bin/env python3
+"""
+Test the skill scripts' helpers offline
+No browser is launched and no network is used: crawls are faked and any
+cache lives in a temporary directory
+"""
+import asyncio
+import contextlib
+import io
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+from crawl_utils import (
+    _canon, arun_many_dispatcher, arun_with_retry, chunks, crawl_many, default_concurrency, json_loads,
+    load_urls, run
+)
+import extraction_pipeline
+import google_search
+
+def test_canon_and_dedup():
+    """Test URL canonicalization and dedup"""
+    print("Testing _canon / load_urls dedup...")
+
+    assert _canon("HTTPS://Example.COM/a/#frag") == "https://example.com/a"
+    assert _canon("https://example.com") == "https://example.com/"
+    assert _canon("https://example.com/?q=1") == "https://example.com/?q=1"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "urls.txt"
+        path.write_text("# comment\nhttps://Example.com/\n\nhttps://example.com\nhttps://example.org/x\n")
+        # Deduped on the canonical form, yielded as written
+        assert list(load_urls(str(path))) == ["https://Example.com/", "https://example.org/x"]
+
+    print("✅ _canon / load_urls dedup")
+
+async def test_url_arguments():
+    """Test single/comma-separated URL arguments and the extraction output format"""
+    print("Testing URL arguments...")
+
+    # A comma inside a single URL must not split it
+    assert list(load_urls("https://x.com/?ids=1,2")) == ["https://x.com/?ids=1,2"]
+    assert list(load_urls(" https://a.com, https://b.com ")) == ["https://a.com", "https://b.com"]
+
+    # One input URL saves the crawler's output as is; several save {url, data} records,
+    # even when only one of them succeeded
+    result = SimpleNamespace(url="https://a.com", extracted_content='{"a": 1}')
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "out.json"
+        await extraction_pipeline._save_extracted([(result, {"a": 1})], str(path), single=True)
+        assert path.read_text() == '{"a": 1}'
+        await extraction_pipeline._save_extracted([(result, {"a": 1})], str(path), single=False)
+        assert json_loads(path.read_bytes()) == [{"url": "https://a.com", "data": {"a": 1}}]
+        assert b"\n" not in path.read_bytes(), "multi-URL output should be compact"
+
+    print("✅ URL arguments")
+
+class FakeCrawler:
+    """Stands in for AsyncWebCrawler: each arun() call plays the next outcome (the last one repeats)"""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    async def arun(self, url, config=None):
+        outcome = self.outcomes[min(self.calls, len(self.outcomes) - 1)]
+        self.calls += 1
+        if isinstance(outcome, Exception):
+            raise outcome
+        # A fresh copy per call, like a new CrawlResult
+        return SimpleNamespace(url=url, **vars(outcome))
+
+def _result(success=True, error_message=None, extracted_content=None):
+    return SimpleNamespace(success=success, error_message=error_message, extracted_content=extracted_content)
+
+async def test_arun_with_retry():
+    """Test which failures arun_with_retry retries and what it returns"""
+    print("Testing arun_with_retry...")
+    url = "https://example.com"
+
+    # Permanent failures are returned after one attempt
+    crawler = FakeCrawler([_result(False, "HTTP 404 Not Found")])
+    result = await arun_with_retry(crawler, url, None, min_delay=0)
+    assert crawler.calls == 1 and not result.success
+
+    # Timeouts reported on the result are retried
+    crawler = FakeCrawler([_result(False, "Page.goto: Timeout 30000ms exceeded")])
+    result = await arun_with_retry(crawler, url, None, min_delay=0)
+    assert crawler.calls == 3 and not result.success and "Timeout" in result.error_message
+
+    # Raised timeouts are retried until an attempt succeeds...
+    crawler = FakeCrawler([asyncio.TimeoutError(), asyncio.TimeoutError(), _result()])
+    result = await arun_with_retry(crawler, url, None, min_delay=0)
+    assert crawler.calls == 3 and result.success
+
+    # ...and re-raised when no attempt returns a result
+    crawler = FakeCrawler([asyncio.TimeoutError()])
+    try:
+        await arun_with_retry(crawler, url, None, min_delay=0)
+    except asyncio.TimeoutError:
+        pass
+    else:
+        raise AssertionError("Expected asyncio.TimeoutError")
+    assert crawler.calls == 3
+
+    # With parse, the parsed value comes back with the result (one parse per attempt)
+    parse_calls = []
+
+    def parse(data):
+        parse_calls.append(data)
+        return json_loads(data)
+
+    crawler = FakeCrawler([_result(extracted_content="{not json"), _result(extracted_content='{"ok": true}')])
+    result, data = await arun_with_retry(crawler, url, None, min_delay=0, parse=parse)
+    assert crawler.calls == 2 and result.success and data == {"ok": True}
+    assert len(parse_calls) == 2
+
+    # Output that never parses is retried, then returned as a failed result
+    crawler = FakeCrawler([_result(extracted_content="{not json")])
+    result, data = await arun_with_retry(crawler, url, None, min_delay=0, parse=json_loads)
+    assert crawler.calls == 3 and not result.success and data is None and result.error_message
+
+    # crawl_many passes parse through and yields (result, parsed) pairs
+    crawler = FakeCrawler([_result(extracted_content='[1]')])
+    pairs = [pair async for pair in crawl_many(crawler, ["https://a.com", "https://b.com"], None, 2,
+                                                 parse=json_loads)]
+    assert sorted((result.url, data) for result, data in pairs) == [("https://a.com", [1]), ("https://b.com", [1])]
+
+    print("✅ arun_with_retry")
+
+def test_default_concurrency():
+    """Test CRAWL4AI_MAX_CONCURRENT handling"""
+    print("Testing default_concurrency...")
+
+    original = os.environ.pop("CRAWL4AI_MAX_CONCURRENT", None)
+    try:
+        cpu_default = default_concurrency()
+        assert 1 <= cpu_default <= 32
+        # Capped by the URL count when it is known
+        assert default_concurrency(["https://example.com"]) == 1
+
+        os.environ["CRAWL4AI_MAX_CONCURRENT"] = "5"
+        assert default_concurrency() == 5
+        # Invalid values warn and fall back to the CPU-derived default
+        for value in ("lots", "0", "-3"):
+            os.environ["CRAWL4AI_MAX_CONCURRENT"] = value
+            assert default_concurrency() == cpu_default, value
+    finally:
+        os.environ.pop("CRAWL4AI_MAX_CONCURRENT", None)
+        if original is not None:
+            os.environ["CRAWL4AI_MAX_CONCURRENT"] = original
+
+    print("✅ default_concurrency")
+
+def test_chunks():
+    """Test chunks() splitting and laziness"""
+    print("Testing chunks...")
+
+    assert list(chunks(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(chunks([], 3)) == []
+    # Reads lazily, so an endless iterator works
+    assert next(chunks(itertools.count(), 3)) == [0, 1, 2]
+
+    print("✅ chunks")
+
+class TimedCrawler:
+    """Stands in for AsyncWebCrawler: arun() sleeps delays.get(url, 0) seconds and tracks concurrency"""
+
+    def __init__(self, delays=None):
+        self.delays = delays or {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def arun(self, url, config=None):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delays.get(url, 0))
+        finally:
+            self.in_flight -= 1
+        return SimpleNamespace(url=url, success=True)
+
+async def test_crawl_many():
+    """Test crawl_many's bounded sliding window"""
+    print("Testing crawl_many...")
+
+    # More URLs than CHUNK_SIZE, with the first one slow
+    urls = [f"https://example.com/{i}" for i in range(250)]
+    crawler = TimedCrawler({urls[0]: 0.2})
+    done = [result.url async for result in crawl_many(crawler, iter(urls), None, max_concurrent=4)]
+
+    assert sorted(done) == sorted(urls)
+    assert crawler.max_in_flight == 4
+    # The slow URL holds one slot while the others drain the rest of the input
+    assert done[-1] == urls[0], "remaining URLs waited for the slow one"
+
+    # Closing the generator early cancels the crawls still in flight
+    crawler = TimedCrawler({url: 0.2 for url in urls[1:]})
+    results = crawl_many(crawler, iter(urls), None, max_concurrent=4)
+    assert (await results.__anext__()).url == urls[0]
+    await results.aclose()
+    await asyncio.sleep(0)
+    assert crawler.in_flight == 0
+
+    print("✅ crawl_many")
+
+# Same selectors as _GOOGLE_SCHEMA's fields (see _HTML_FIELDS)
+_FIELD_SELECTORS = {
+    "title": "h3",
+    "link": "a",
+    "description": "div.VwiC3b, div.s, span.aCOpRe",
+    "site_name": "div.NJo7tc, span.VuuXrf, cite",
+}
+_RANDOM_TAGS = [("h3", None), ("a", None), ("div", "VwiC3b"), ("div", "s"), ("div", "NJo7tc"),
+                ("span", "aCOpRe"), ("span", "VuuXrf"), ("cite", None), ("div", "other"),
+                ("span", None), ("p", None)]
+
+def _random_children(rng, depth):
+    html = []
+    for i in range(rng.randint(0, 3)):
+        tag, cls = rng.choice(_RANDOM_TAGS)
+        attrs = f' class="{cls}"' if cls else ""
+        if tag == "a":
+            attrs += f' href="/url?q=https://example.com/{rng.randint(0, 99)}"'
+        inner = _random_children(rng, depth - 1) if depth else ""
+        html.append(f"<{tag}{attrs}>t{i}{inner}</{tag}>")
+    return "".join(html)
+
+# A small results page: nested containers for one result, an in-page link to skip,
+# and a redirect link to unwrap
+_SERP_HTML = """
+<div class="g"><div class="tF2Cxc">
+  <a href="/url?q=https://go.dev/&amp;sa=U"><h3>The Go Programming Language</h3></a>
+  <cite>go.dev</cite><div class="VwiC3b">Build simple, secure, scalable systems.</div>
+</div></div>
+<div class="g"><a href="#"><h3>Skip me</h3></a></div>
+<div class="tF2Cxc"><a href="https://example.com/x"><h3>Example</h3></a><span class="VuuXrf">Example</span></div>
+"""
+_SERP_RESULTS = [
+    {"title": "The Go Programming Language", "link": "https://go.dev/",
+     "description": "Build simple, secure, scalable systems.", "site_name": "go.dev"},
+    {"title": "Example", "link": "https://example.com/x", "description": "", "site_name": "Example"},
+]
+
+def _parse_with_bs4(html, max_results=20):
+    """parse_results_html as it runs without selectolax"""
+    original = google_search._lexbor_parser
+    google_search._lexbor_parser = lambda: None
+    try:
+        return google_search.parse_results_html(html, max_results)
+    finally:
+        google_search._lexbor_parser = original
+
+def _random_page(rng):
+    """Result blocks built only from markup both parsers build the same tree for"""
+    def children(depth, inside_link):
+        html = []
+        for i in range(rng.randint(0, 3)):
+            tag, cls = rng.choice([t for t in _RANDOM_TAGS if t[0] != "p" and not (inside_link and t[0] in ("a", "h3"))])
+            attrs = f' class="{cls}"' if cls else ""
+            if tag == "a":
+                attrs += f' href="/url?q=https://example.com/{rng.randint(0, 30)}"'
+            inner = children(depth - 1, inside_link or tag in ("a", "h3")) if depth else ""
+            html.append(f"<{tag}{attrs}>t{i}{inner}</{tag}>")
+        return "".join(html)
+
+    return "".join(f'<div class="{rng.choice(["g", "tF2Cxc"])}">{children(3, False)}</div>'
+                   for _ in range(rng.randint(1, 8)))
+
+def test_parse_results_html():
+    """Test the HTML fallback with BeautifulSoup, and selectolax against it when installed"""
+    print("Testing parse_results_html...")
+
+    # The BeautifulSoup path runs on every install (bs4 comes with Crawl4AI)
+    assert _parse_with_bs4(_SERP_HTML) == _SERP_RESULTS
+    assert _parse_with_bs4(_SERP_HTML, max_results=1) == _SERP_RESULTS[:1]
+
+    if google_search._lexbor_parser() is None:
+        print("⚠️ selectolax not installed, only the BeautifulSoup path was tested")
+        return
+
+    assert google_search.parse_results_html(_SERP_HTML) == _SERP_RESULTS
+    rng = random.Random(1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(200):
+            html = _random_page(rng)
+            assert google_search.parse_results_html(html) == _parse_with_bs4(html), html
+
+    print("✅ parse_results_html")
+
+def test_collect_fields():
+    """Test _collect_fields against per-field css_first on randomized result blocks"""
+    print("Testing _collect_fields...")
+
+    parser = google_search._lexbor_parser()
+    if parser is None:
+        print("⚠️ selectolax not installed, skipping")
+        return
+
+    rng = random.Random(0)
+    for _ in range(300):
+        block = parser(f'<div class="g">{_random_children(rng, 3)}</div>').css_first("div.g")
+        fields = google_search._collect_fields(block)
+        for field, selector in _FIELD_SELECTORS.items():
+            expected = block.css_first(selector)
+            actual = fields.get(field)
+            if expected is None:
+                assert actual is None, f"{field}: unexpected match in {block.html}"
+            else:
+                assert actual is not None and actual == expected, f"{field}: wrong node in {block.html}"
+
+    print("✅ _collect_fields")
+
+async def test_search_cache():
+    """Test the search result cache TTL and the --no-cache refresh"""
+    print("Testing search cache...")
+
+    original_dir, original_search = google_search.SEARCH_CACHE_DIR, google_search._search_google
+    fresh = [{"title": "Fresh", "link": "https://fresh.example.com"}]
+
+    async def fake_search(search_url, query, max_results=20, verbose=False):
+        return fresh
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            google_search.SEARCH_CACHE_DIR = Path(tmp)
+            google_search._search_google = fake_search
+            stale = [{"title": "Stale", "link": "https://stale.example.com"}]
+
+            assert google_search.load_cached_results("go", 10) is None
+            google_search.save_cached_results("go", 10, stale)
+            assert google_search.load_cached_results("go", 10) == stale
+            # Keyed on max_results too
+            assert google_search.load_cached_results("go", 20) is None
+
+            # A cache hit skips the search
+            assert await google_search.search_google("go", 10) == stale
+            # use_cache=False searches again and refreshes the cache
+            assert await google_search.search_google("go", 10, use_cache=False) == fresh
+            assert google_search.load_cached_results("go", 10) == fresh
+
+            # Entries older than the TTL are ignored
+            expired = time.time() - google_search.SEARCH_CACHE_TTL - 1
+            os.utime(google_search._cache_path("go", 10), (expired, expired))
+            assert google_search.load_cached_results("go", 10) is None
+    finally:
+        google_search.SEARCH_CACHE_DIR, google_search._search_google = original_dir, original_search
+
+    print("✅ search cache")
+
+@contextlib.contextmanager
+def _patched(module, **attrs):
+    """Temporarily replace module attributes"""
+    originals = {name: getattr(module, name) for name in attrs}
+    for name, value in attrs.items():
+        setattr(module, name, value)
+    try:
+        yield
+    finally:
+        for name, value in originals.items():
+            setattr(module, name, value)
+
+def test_merge_page_results():
+    """Test search page URLs and merging of result pages"""
+    print("Testing search_page_urls / merge_page_results...")
+
+    url = google_search.build_search_url("go", 25)
+    assert google_search.search_page_urls(url, 25) == [url, f"{url}&start=10", f"{url}&start=20"]
+    assert google_search.search_page_urls(url, 10) == [url]
+
+    page1 = [{"link": "https://a.com", "title": "A"}, {"link": "https://b.com", "title": "B"}]
+    page2 = [{"link": "https://b.com", "title": "B again"}, {"link": "https://c.com", "title": "C"}]
+    merged = google_search.merge_page_results([page1, page2], 20)
+    # Page order kept, overlapping results keep their first occurrence
+    assert [r["title"] for r in merged] == ["A", "B", "C"]
+    assert len(google_search.merge_page_results([page1, page2], 2)) == 2
+    assert google_search.merge_page_results([], 20) == []
+
+    print("✅ search_page_urls / merge_page_results")
+
+def _links(prefix, n):
+    return [{"link": f"https://{prefix}{i}.com"} for i in range(n)]
+
+async def test_fetch_following_pages():
+    """Test that extra result pages are fetched one at a time and only while needed"""
+    print("Testing fetch_following_pages...")
+
+    url = google_search.build_search_url("go", 25)
+    pages = {}
+    fetched = []
+    in_flight = 0
+
+    async def fake_fetch(page_url):
+        nonlocal in_flight
+        in_flight += 1
+        assert in_flight == 1, "result pages fetched concurrently"
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        fetched.append(page_url)
+        return SimpleNamespace(url=page_url, success=page_url in pages, html=page_url, error_message="boom")
+
+    async def fake_parse(html, search_url, max_results=20, verbose=False):
+        return pages[search_url]
+
+    async def follow(first_page, max_results=25):
+        fetched.clear()
+        with contextlib.redirect_stdout(io.StringIO()):
+            return await google_search.fetch_following_pages(url, first_page, max_results)
+
+    with _patched(google_search, fetch_search_page=fake_fetch, parse_search_page=fake_parse,
+                  RATE_LIMIT_BASE_DELAY=(0.0, 0.0)):
+        pages = {f"{url}&start=10": _links("b", 10), f"{url}&start=20": _links("c", 10)}
+        results = await follow(_links("a", 10))
+        assert [r["link"] for r in results] == [r["link"] for r in _links("a", 10) + _links("b", 10) + _links("c", 5)]
+        assert fetched == [f"{url}&start=10", f"{url}&start=20"]
+
+        # Enough results, or num= honoured (more than a page): no extra requests
+        assert len(await follow(_links("a", 10), 10)) == 10 and fetched == []
+        assert len(await follow(_links("a", 20))) == 20 and fetched == []
+        assert await follow([]) == [] and fetched == []
+
+        # A page without new links ends paging
+        pages[f"{url}&start=10"] = _links("a", 10)
+        assert len(await follow(_links("a", 10))) == 10
+        assert fetched == [f"{url}&start=10"]
+
+        # A failed page keeps what was already found
+        del pages[f"{url}&start=10"]
+        assert len(await follow(_links("a", 10))) == 10
+        assert fetched == [f"{url}&start=10"]
+
+    print("✅ fetch_following_pages")
+
+def test_arun_many_dispatcher():
+    """Test the concurrency cap and per-domain pacing passed to arun_many"""
+    print("Testing arun_many_dispatcher...")
+
+    dispatcher = arun_many_dispatcher(5)
+    assert dispatcher.max_session_permit == 5
+    # RateLimiter()'s defaults, not the 0.1-0.4s delays of a CrawlerRunConfig
+    assert tuple(dispatcher.rate_limiter.base_delay) == (1.0, 3.0)
+    assert dispatcher.rate_limiter.max_delay == 60.0
+
+    print("✅ arun_many_dispatcher")
+
+class FakeSearchCrawler:
+    """Stands in for the search browser: arun_many() records its arguments, every page loads"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def arun_many(self, urls, config=None, **kwargs):
+        self.calls.append((list(urls), kwargs))
+        return [SimpleNamespace(url=url, success=True, html=url, error_message=None) for url in reversed(urls)]
+
+async def test_search_many():
+    """Test search_many batching, dispatcher and caching"""
+    print("Testing search_many...")
+
+    crawler = FakeSearchCrawler()
+
+    async def fake_get_crawler():
+        return crawler
+
+    async def fake_parse(html, search_url, max_results=20, verbose=False):
+        return [] if "empty" in search_url else [{"title": search_url, "link": search_url}]
+
+    async def fake_llm_fallback(search_url, query, max_results=20):
+        return []
+
+    with tempfile.TemporaryDirectory() as tmp, _patched(
+            google_search, SEARCH_CACHE_DIR=Path(tmp), get_search_crawler=fake_get_crawler,
+            parse_search_page=fake_parse, search_google_llm_fallback=fake_llm_fallback):
+        results = await google_search.search_many(["go", "rust", "go", "empty"], 10)
+
+        # One arun_many for the distinct queries, capped and paced by an explicit dispatcher
+        assert len(crawler.calls) == 1
+        urls, kwargs = crawler.calls[0]
+        assert sorted(urls) == sorted(google_search.build_search_url(q, 10) for q in ("go", "rust", "empty"))
+        dispatcher = kwargs["dispatcher"]
+        assert dispatcher.max_session_permit == min(default_concurrency(urls), google_search.MAX_CONCURRENT_SEARCHES)
+        assert tuple(dispatcher.rate_limiter.base_delay) == (1.0, 3.0)
+        assert "max_concurrent" not in kwargs
+
+        assert list(results) == ["go", "rust", "empty"]
+        assert results["go"][0]["link"] == google_search.build_search_url("go", 10)
+        assert results["empty"] == []
+
+        # Non-empty results were cached; only the empty query is fetched again
+        with contextlib.redirect_stdout(io.StringIO()):
+            again = await google_search.search_many(["go", "rust", "empty"], 10)
+        assert again == results
+        assert crawler.calls[1][0] == [google_search.build_search_url("empty", 10)]
+
+    print("✅ search_many")
+
+async def main():
+    test_canon_and_dedup()
+    await test_url_arguments()
+    test_default_concurrency()
+    await test_arun_with_retry()
+    test_chunks()
+    await test_crawl_many()
+    test_collect_fields()
+    test_parse_results_html()
+    await test_search_cache()
+    test_arun_many_dispatcher()
+    await test_search_many()
+    test_merge_page_results()
+    await test_fetch_following_pages()
+
+if __name__ == "__main__":
+    run(main())
+    print("\n✅ All offline helper tests passed!")